@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+
+from rich.console import Console
+from rich.table import Table
+from langchain_core.messages import HumanMessage
+
+from swi.bench.scenarios import SCENARIOS, Scenario
+from swi.core.builder import CodingAgent
+from swi.core.checkpoint import SqliteCheckpointer
+from swi.core.prompt import get_context
+from swi.utils.config import CACHE_DIR, CHECKPOINT_DB, TRACE_DIR
+from swi.utils.model import ModelLoader, FakeLoader
+from swi.utils.tracing import tracer
+
+console = Console()
+
+# Metrics compared against a baseline with --compare, lower is better for all of them
+REGRESSION_METRICS = ["overhead_per_step_ms", "tool_p95_ms", "peak_rss_mb", "tokens_sent"]
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def _busy_ms(spans) -> float:
+    """Wall time covered by the spans. Parallel nodes are only counted once."""
+    total, end = 0, None
+    for span in sorted(spans, key=lambda s: s.start_ns):
+        if end is None or span.start_ns > end:
+            total += span.end_ns - span.start_ns
+            end = span.end_ns
+        elif span.end_ns > end:
+            total += span.end_ns - end
+            end = span.end_ns
+    return total / 1e6
+
+
+def summarise(scenario: Scenario, spans: list, wall_ms: float) -> dict:
+    """Turn the spans of one run into the reported metrics."""
+    nodes = [span for span in spans if span.name.startswith("node:")]
+    models = [span for span in spans if span.name.startswith("model")]
+    tools = [span for span in spans if span.name.startswith("tool:")]
+    tool_ms = [span.duration_ms for span in tools]
+    overhead_ms = max(wall_ms - _busy_ms(nodes), 0.0)
+    node_ms = sum(span.duration_ms for span in spans if span.name == "node:call_model")
+    model_ms = sum(span.duration_ms for span in spans if span.name == "model")
+    return {
+        "scenario": scenario.name,
+        "turns": len(scenario.turns),
+        "wall_ms": wall_ms,
+        "steps": len(nodes),
+        # Time spent by langgraph itself (scheduling, checkpoints, streaming) between nodes,
+        # plus the time call_model spends around the model (prompt assembly, merging chunks)
+        "overhead_per_step_ms": (overhead_ms + node_ms - model_ms) / max(len(nodes), 1),
+        "model_calls": len(models),
+        "model_ms": sum(span.duration_ms for span in models),
+        "tokens_sent": sum(span.attributes.get("input_tokens", 0) for span in models),
+        "tool_calls": len(tools),
+        "tool_p50_ms": percentile(tool_ms, 0.50),
+        "tool_p95_ms": percentile(tool_ms, 0.95),
+        "tool_max_ms": max(tool_ms, default=0.0),
+        "compressions": sum(1 for span in spans if span.name == "node:compress_context"),
+        "peak_rss_mb": max((span.attributes.get("process.rss_bytes", 0) for span in spans), default=0) / 2**20,
+    }
+
+
+async def run_scenario(scenario: Scenario, latency: float = 0.0, token_latency: float = 0.0) -> dict:
+    """Run one scenario in a scratch project folder and return its metrics."""
+    root = tempfile.mkdtemp(prefix=f"swi-bench-{scenario.name}-")
+    cwd = os.getcwd()
+    os.chdir(root)
+    checkpointer = None
+    try:
+        scenario.setup(root)
+        loader = ModelLoader("fake")
+        loader.providers["fake"] = FakeLoader(scenario.script, latency, token_latency)
+        agent = CodingAgent(loader, compress_budget=scenario.compress_budget)
+        checkpointer = SqliteCheckpointer(os.path.join(root, CACHE_DIR, CHECKPOINT_DB))
+        graph = await agent.builder(checkpointer)
+
+        tracer.enable(scenario.name, folder=os.path.join(root, CACHE_DIR, TRACE_DIR))
+        config = {"configurable": {"thread_id": scenario.name}, "recursion_limit": 200}
+        start = time.perf_counter()
+        for turn in scenario.turns:
+            async for _ in graph.astream(
+                {"messages": HumanMessage(turn), "context": get_context()},
+                config=config,
+                stream_mode=["messages", "custom"],
+            ):
+                pass
+        wall_ms = (time.perf_counter() - start) * 1000
+        return summarise(scenario, tracer.spans, wall_ms)
+    finally:
+        tracer.enabled = False
+        if checkpointer is not None:
+            checkpointer.conn.close()
+        os.chdir(cwd)
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def report(results: list[dict]):
+    table = Table(title="swi benchmarks", show_header=True, header_style="bold magenta")
+    columns = [
+        ("Scenario", "scenario", "{}"),
+        ("Wall s", "wall_ms", "{:.2f}", 1 / 1000),
+        ("Steps", "steps", "{}"),
+        ("Overhead/step ms", "overhead_per_step_ms", "{:.2f}"),
+        ("Model calls", "model_calls", "{}"),
+        ("Tokens sent", "tokens_sent", "{:,}"),
+        ("Tool p50 ms", "tool_p50_ms", "{:.1f}"),
+        ("Tool p95 ms", "tool_p95_ms", "{:.1f}"),
+        ("Compressions", "compressions", "{}"),
+        ("Peak RSS MB", "peak_rss_mb", "{:.1f}"),
+    ]
+    for title, *_ in columns:
+        table.add_column(title, justify="left" if title == "Scenario" else "right")
+    for result in results:
+        row = []
+        for _, key, fmt, *scale in columns:
+            value = result[key] * scale[0] if scale else result[key]
+            row.append(fmt.format(value))
+        table.add_row(*row)
+    console.print(table)
+
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> list[str]:
+    """Regressions of more than `tolerance` (a fraction) against a saved --json run."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {result["scenario"]: result for result in json.load(f)}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["scenario"])
+        if previous is None:
+            continue
+        for metric in REGRESSION_METRICS:
+            old, new = previous.get(metric, 0), result[metric]
+            if old and new > old * (1 + tolerance):
+                regressions.append(f"{result['scenario']}.{metric}: {old:.2f} -> {new:.2f} (+{new / old - 1:.0%})")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="swi-bench", description="Offline agent benchmarks with a scripted model")
+    parser.add_argument("scenarios", nargs="*", help=f"scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before the first token of every reply")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds between streamed words")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="fail on regressions against a previous --json file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression for --compare (default 0.2)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = args.scenarios or list(SCENARIOS)
+    if unknown := [name for name in names if name not in SCENARIOS]:
+        sys.exit(f"Unknown scenario(s): {', '.join(unknown)}")
+    results = []
+    for name in names:
+        console.print(f"[cyan]Running {name}:[/cyan] {SCENARIOS[name].description}")
+        results.append(asyncio.run(run_scenario(SCENARIOS[name], args.latency, args.token_latency)))
+    report(results)
+    failed = False
+    for result in results:
+        limit = SCENARIOS[result["scenario"]].max_compressions
+        if limit is not None and result["compressions"] > limit:
+            console.print(f"[bold red]{result['scenario']}: {result['compressions']} compressions, expected at most {limit}[/bold red]")
+            failed = True
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        if regressions := compare(results, args.compare, args.tolerance):
+            console.print("[bold red]Regressions:[/bold red]\n" + "\n".join(regressions))
+            sys.exit(1)
+        console.print("[green]No regressions.[/green]")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import os
+import sys
+from dataclasses import dataclass
+from typing import Callable
+
+from langchain_core.messages import AIMessage
+
+from swi.utils.config import COMPRESS_TOKEN_BUDGET
+from swi.utils.fake_model import scripted
+from swi.core.tools.file_tool import FILE
+from swi.core.tools.shell_tool import SHELL
+
+
+@dataclass
+class Scenario:
+    """A benchmark: files to create, user turns to send and the scripted model replies."""
+
+    name: str
+    description: str
+    setup: Callable[[str], None]
+    turns: list[str]
+    script: list[AIMessage]
+    compress_budget: int = COMPRESS_TOKEN_BUDGET
+    # The run fails if context compression runs more often than this
+    max_compressions: int = None
+
+
+def _write_files(root: str, count: int, folders: int = 1, lines: int = 40):
+    for i in range(count):
+        folder = os.path.join(root, "src", f"pkg{i % folders}")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"module_{i}.py"), "w", encoding="utf-8") as f:
+            f.write("".join(f"def function_{i}_{n}(value):\n    return value + {n}\n" for n in range(lines // 2)))
+
+
+def _read(path: str) -> dict:
+    return {"name": FILE.READFILE.value, "args": {"path": path}}
+
+
+def _shell(command: str) -> dict:
+    return {"name": SHELL.SHELL.value, "args": {"command": command}}
+
+
+def many_reads() -> Scenario:
+    """10 model steps, each reading 10 files in parallel."""
+    script = [
+        scripted("Reading files.", [_read(f"src/pkg0/module_{step * 10 + i}.py") for i in range(10)])
+        for step in range(10)
+    ]
+    script.append(scripted("Read all the files."))
+    return Scenario(
+        name="many_reads",
+        description="100 single file reads, 10 parallel calls per step",
+        setup=lambda root: _write_files(root, 100),
+        turns=["Read the modules."],
+        script=script,
+    )
+
+
+def large_glob() -> Scenario:
+    """Globs over a few thousand files, mostly cut by the read budget."""
+    script = [scripted("Globbing.", [_read("src/**/*.py")]) for _ in range(5)]
+    script.append(scripted("Globbed."))
+    return Scenario(
+        name="large_glob",
+        description="5 reads of a 3,000 file glob",
+        setup=lambda root: _write_files(root, 3000, folders=30, lines=10),
+        turns=["Look at every module."],
+        script=script,
+    )
+
+
+def long_shell_output() -> Scenario:
+    """Commands writing megabytes to stdout and stderr."""
+    command = (
+        f'"{sys.executable}" -c "import sys\n'
+        "for i in range(200000): print('line', i)\n"
+        "for i in range(50000): print('err', i, file=sys.stderr)\""
+    )
+    script = [scripted("Running.", [_shell(command)]) for _ in range(3)]
+    script.append(scripted("Ran."))
+    return Scenario(
+        name="long_shell_output",
+        description="3 commands with ~3 MB of interleaved output each",
+        setup=lambda root: None,
+        turns=["Run the noisy command."],
+        script=script,
+    )
+
+
+def long_session() -> Scenario:
+    """50 user turns, each with one tool call and an answer."""
+    script = []
+    for turn in range(50):
+        script.append(scripted(f"Checking module {turn}.", [_read(f"src/pkg0/module_{turn}.py")]))
+        script.append(scripted(f"Module {turn} defines 20 functions."))
+    return Scenario(
+        name="long_session",
+        description="50 turns with a read each, history grows to ~100 messages",
+        setup=lambda root: _write_files(root, 50),
+        turns=[f"What is in module {turn}?" for turn in range(50)],
+        script=script,
+    )
+
+
+def compression() -> Scenario:
+    """A budget just above the fixed prompt, so the history is summarised every few turns, not every step."""
+    script = []
+    for turn in range(20):
+        script.append(scripted(f"Reading batch {turn}.", [_read(f"src/pkg0/module_{turn * 3 + i}.py") for i in range(3)]))
+        script.append(scripted(f"Batch {turn} done."))
+    return Scenario(
+        name="compression",
+        description="20 turns of 3 reads with a 9,000 token compression budget",
+        setup=lambda root: _write_files(root, 60, lines=80),
+        turns=[f"Read batch {turn}." for turn in range(20)],
+        script=script,
+        compress_budget=9_000,
+        max_compressions=10,
+    )
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (many_reads(), large_glob(), long_shell_output(), long_session(), compression())
+}
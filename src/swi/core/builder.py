@@ -1,52 +1,130 @@
+import os
+import json
+import time
+import asyncio
 from langgraph.graph import StateGraph, START
-from langgraph.prebuilt import ToolNode
 from swi.utils.model import ModelLoader
-from langchain_core.messages import SystemMessage
-from swi.core.prompt import compress_prompt , get_prompt
-from langgraph.checkpoint.memory import InMemorySaver
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, RemoveMessage
+from langchain_core.messages.utils import count_tokens_approximately, message_chunk_to_message
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from swi.core.prompt import compress_prompt , get_context, get_static_prompt, get_prompt_cache_key, get_retrieved
 from rich.console import Console
 from typing import Literal
 from langgraph.types import Command
-from swi.core.tools.file_tool import get_file_content,edit_file, write_file_tool, note_pad
+from langgraph.config import get_stream_writer
+from swi.core.tools.file_tool import get_file_content,edit_file, edit_files, write_file_tool
+from swi.core.tools.memory_tool import note_pad, recall
+from swi.core.tools.artifact_tool import read_artifact
 from swi.core.tools.shell_tool import shell_tool
 from swi.core.tools.fetch_tool import fetch_url_content
+from swi.core.tools.code_tool import search_code, outline_file, find_definition
+from swi.core.tool_executor import ToolExecutor
+from swi.core.checkpoint import get_checkpointer
 from langgraph.graph import MessagesState
+from swi.utils.config import COMPRESS_TOKEN_BUDGET, RETRIEVE_ENABLED
+from swi.utils.tracing import tracer
+from swi.utils.rate_limit import priority, BACKGROUND
+from swi.utils.trigram_index import get_trigram_index
+from swi.utils.bm25 import get_bm25_index
 
 console = Console()
 
-checkpointer = InMemorySaver()
-
 class ContextState(MessagesState):
     context: str
+    summary: str
+    retrieved: str
 
 
 class CodingAgent:
-    def __init__(self):
+    def __init__(self, loader: ModelLoader = None, compress_budget: int = COMPRESS_TOKEN_BUDGET):
         self.tools = [
             get_file_content,
             write_file_tool,
             edit_file,
+            edit_files,
             note_pad,
+            recall,
             fetch_url_content,
             shell_tool,
+            search_code,
+            outline_file,
+            find_definition,
+            read_artifact,
         ]
-        self.model = ModelLoader().load()
+        self.compress_budget = compress_budget
+        # Reuse the loader (and model client) that already validated the keys
+        loader = loader or ModelLoader()
+        self.model = loader.load()
+        self.model_with_tools = self.model.bind_tools(
+            self.tools, **loader.cache_kwargs(get_prompt_cache_key())
+        )
+        # Tool schemas are sent with every call but can never be summarised
+        self.tool_tokens = len(json.dumps([convert_to_openai_tool(tool) for tool in self.tools])) // 4
+
+    def count_tokens(self, state: ContextState) -> int:
+        """Tokens of the conversation (history and summary) the next model call will send.
+
+        Uses the input token usage reported for the last model response when
+        available, minus the overhead call_model recorded for the static prompt,
+        tree, retrieved snippets and tool schemas, which compression cannot
+        shrink. Messages added after that response are estimated.
+        """
+        messages = state.get("messages", [])
+        for index in range(len(messages) - 1, -1, -1):
+            message = messages[index]
+            if isinstance(message, AIMessage) and message.usage_metadata:
+                usage = message.usage_metadata
+                return max(0, (
+                    usage.get("input_tokens", 0)
+                    + usage.get("output_tokens", 0)
+                    - message.response_metadata.get("overhead_tokens", 0)
+                )) + count_tokens_approximately(messages[index + 1:])
+        return count_tokens_approximately(messages) + len(state.get("summary", "")) // 4
+
+    @staticmethod
+    def _compression_boundary(messages: list) -> int:
+        """Index of the first message to keep.
+
+        Everything before the latest AI message is summarised. That message and
+        its tool results stay, so tool calls are never separated from their results.
+        """
+        for index in range(len(messages) - 1, -1, -1):
+            if isinstance(messages[index], AIMessage):
+                return index
+        return 0
 
     async def compress_context(self, state: ContextState):
-        """Compress the Messages"""
+        """Summarise older messages and drop them from the history"""
         messages = state.get("messages", [])
-        summary = self.model.invoke([SystemMessage(compress_prompt)] + messages)
-        return {"context": state.get("context")+ "\n"+ summary}
+        keep_from = self._compression_boundary(messages)
+        if keep_from <= 0:
+            return {}
+
+        old_messages = messages[:keep_from]
+        request = [SystemMessage(compress_prompt)]
+        if previous := state.get("summary"):
+            request.append(HumanMessage(f"Snapshot of the conversation before these messages:\n{previous}"))
+        request += old_messages
+        request.append(HumanMessage("Generate the <state_snapshot> for the conversation above."))
+
+        # Queued behind interactive calls when the provider quota is tight
+        with tracer.span("model:compress", messages=len(request)) as span, priority(BACKGROUND):
+            summary = await self.model.ainvoke(request)
+            if usage := summary.usage_metadata:
+                span.set(input_tokens=usage.get("input_tokens", 0), output_tokens=usage.get("output_tokens", 0))
+        return {
+            "summary": summary.content,
+            "messages": [RemoveMessage(id=message.id) for message in old_messages],
+        }
 
     async def conditional_node(
         self,
         state: ContextState,
         messages_key: str = "messages",
-    ) -> Command[Literal["tools", "call_model"]]:
+    ) -> Command[Literal["tools", "compress_context", "__end__"]]:
         """Conditional Node"""
 
-        if len(state.get(messages_key,[]))>15:
-            return Command(goto=compress_prompt)
+        compress = self.count_tokens(state) > self.compress_budget
         if isinstance(state, list):
             ai_message = state[-1]
         elif isinstance(state, dict) and (messages := state.get(messages_key, [])):
@@ -56,31 +134,91 @@ class CodingAgent:
         else:
             raise ValueError(f"No messages found in input state to tool_edge: {state}")
         if hasattr(ai_message, "tool_calls") and len(ai_message.tool_calls) > 0:
-            return Command(goto="tools", update={"context": get_prompt()})
-
+            # Summarisation runs in the same step as the tools, so it overlaps with them
+            goto = ["tools", "compress_context"] if compress else "tools"
+            return Command(goto=goto, update={"context": get_context()})
 
+        if compress:
+            return Command(goto="compress_context")
         return Command(goto="__end__")
 
+    def cache_report(self, response: AIMessage) -> str:
+        """Describe how much of the prompt the provider served from its prefix cache."""
+        usage = getattr(response, "usage_metadata", None)
+        if not usage or not usage.get("input_tokens"):
+            return None
+        total = usage["input_tokens"]
+        cached = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+        return f"Prompt cache: {cached:,}/{total:,} input tokens cached ({cached / total:.0%}), {total - cached:,} uncached"
+
+    async def retrieve(self, state: ContextState):
+        """Rank the project files against a new user message and keep the best snippets"""
+        messages = state.get("messages", [])
+        if not RETRIEVE_ENABLED or not messages or not isinstance(messages[-1], HumanMessage):
+            return {}
+        query = messages[-1].text()
+        retrieved, paths = await asyncio.to_thread(get_retrieved, query)
+        if paths:
+            get_stream_writer()(f"Relevant files: {', '.join(paths)}")
+        return {"retrieved": retrieved}
+
     async def call_model(self, state: ContextState):
-        response = self.model.bind_tools(self.tools).invoke(
-            [SystemMessage(state.get("context", ""))] + state.get("messages", [])
-        )
-        print(state.get("messages"))
+        # Static prompt first and volatile context last: the tree changing after a
+        # tool call must not invalidate the cached prefix (prompt + history).
+        context = state.get("context", "")
+        if retrieved := state.get("retrieved"):
+            context += f"\n\n# Relevant Files\nRanked for the latest user message, read more with the file tools.\n{retrieved}"
+        # Everything but the history and summary, see count_tokens
+        overhead = count_tokens_approximately([SystemMessage(get_static_prompt()), SystemMessage(context)]) + self.tool_tokens
+        if summary := state.get("summary"):
+            context += f"\n\n# Conversation Summary\n{summary}"
+        messages = [SystemMessage(get_static_prompt())] + state.get("messages", [])
+        if context:
+            messages.append(SystemMessage(context))
+        # Stream so tokens reach the `messages` stream mode as they arrive
+        response = None
+        with tracer.span("model", messages=len(messages)) as span:
+            start = time.perf_counter()
+            async for chunk in self.model_with_tools.astream(messages):
+                if response is None:
+                    span.set(ttft_ms=(time.perf_counter() - start) * 1000)
+                response = chunk if response is None else response + chunk
+            span.set(latency_ms=(time.perf_counter() - start) * 1000)
+            if response is None:
+                return {"messages": AIMessage("")}
+            response = message_chunk_to_message(response)
+            response.response_metadata["overhead_tokens"] = overhead
+            if usage := response.usage_metadata:
+                span.set(
+                    input_tokens=usage.get("input_tokens", 0),
+                    output_tokens=usage.get("output_tokens", 0),
+                    cached_tokens=(usage.get("input_token_details") or {}).get("cache_read", 0) or 0,
+                )
+        if report := self.cache_report(response):
+            get_stream_writer()(report)
         return {"messages": response}
 
-    async def builder(self):
-        """Builds Graph"""
+    async def builder(self, checkpointer=None):
+        """Builds Graph. Uses the process wide checkpointer unless one is given."""
+        # Index the project while the user types the first message. search_code
+        # scans the files and retrieval is skipped until the indexes are ready
+        get_trigram_index(os.getcwd()).start_refresh()
+        if RETRIEVE_ENABLED:
+            get_bm25_index(os.getcwd()).start_refresh()
+
         builder = StateGraph(ContextState)
 
-        builder.add_node("call_model", self.call_model)
-        builder.add_node("tools", ToolNode(self.tools))
-        builder.add_node("conditional_node", self.conditional_node)
+        builder.add_node("retrieve", tracer.traced("node:retrieve")(self.retrieve))
+        builder.add_node("call_model", tracer.traced("node:call_model")(self.call_model))
+        builder.add_node("tools", tracer.traced("node:tools")(ToolExecutor(self.tools)))
+        builder.add_node("conditional_node", tracer.traced("node:conditional_node")(self.conditional_node))
+        builder.add_node("compress_context", tracer.traced("node:compress_context")(self.compress_context))
 
-        # Order: START -> context -> model
-        builder.add_edge(START, "call_model")
+        # Order: START -> retrieve -> model -> conditional -> (tools [+ compress_context]) -> model
+        # conditional_node routes with Command, compress_context ends its branch
+        builder.add_edge(START, "retrieve")
+        builder.add_edge("retrieve", "call_model")
         builder.add_edge("call_model", "conditional_node")
-        builder.add_edge("conditional_node","tools")
-        builder.add_edge("conditional_node","__end__")
         builder.add_edge("tools", "call_model")
 
-        return builder.compile(checkpointer=checkpointer)
+        return builder.compile(checkpointer=checkpointer or get_checkpointer())
@@ -0,0 +1,434 @@
+import os
+import json
+import random
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from swi.utils.config import CACHE_DIR, CHECKPOINTER, CHECKPOINT_DB, CHECKPOINT_RETENTION
+
+# Blob type used for message lists stored as references into the messages table
+MESSAGE_REFS = "message_refs"
+
+SCHEMA = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    channel_versions TEXT,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS message_refs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version, idx)
+);
+CREATE INDEX IF NOT EXISTS message_refs_hash ON message_refs (hash);
+CREATE TABLE IF NOT EXISTS messages (
+    hash TEXT PRIMARY KEY,
+    type TEXT,
+    blob BLOB
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT,
+    type TEXT,
+    blob BLOB,
+    task_path TEXT,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+class SqliteCheckpointer(BaseCheckpointSaver[str]):
+    """
+    Checkpointer backed by a local SQLite file.
+
+    Channel values are stored once per version, like InMemorySaver. Message
+    lists are stored as references into a content-addressed `messages` table,
+    so a message is written once no matter how many checkpoints contain it.
+    Only the latest `retention` checkpoints of a thread are kept; older ones,
+    their writes, blobs and unreferenced messages are compacted away.
+    """
+
+    def __init__(self, path: str = None, retention: int = CHECKPOINT_RETENTION, *, serde=None):
+        super().__init__(serde=serde)
+        self.path = path or os.path.join(CACHE_DIR, CHECKPOINT_DB)
+        self.retention = retention
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    # -------------------------------
+    # Serialisation helpers
+    # -------------------------------
+    def _dump_value(self, cur, thread_id, checkpoint_ns, channel, version, value):
+        if isinstance(value, list) and value and all(isinstance(m, BaseMessage) for m in value):
+            for idx, message in enumerate(value):
+                type_, blob = self.serde.dumps_typed(message)
+                digest = hashlib.sha256(type_.encode() + b"\0" + blob).hexdigest()
+                cur.execute("INSERT OR IGNORE INTO messages VALUES (?, ?, ?)", (digest, type_, blob))
+                cur.execute(
+                    "INSERT OR REPLACE INTO message_refs VALUES (?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, channel, version, idx, digest),
+                )
+            return MESSAGE_REFS, b""
+        return self.serde.dumps_typed(value)
+
+    def _load_blobs(self, cur, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> dict[str, Any]:
+        channel_values: dict[str, Any] = {}
+        for channel, version in versions.items():
+            row = cur.execute(
+                "SELECT type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row is None or row[0] == "empty":
+                continue
+            if row[0] == MESSAGE_REFS:
+                rows = cur.execute(
+                    "SELECT m.type, m.blob FROM message_refs r JOIN messages m ON m.hash = r.hash "
+                    "WHERE r.thread_id = ? AND r.checkpoint_ns = ? AND r.channel = ? AND r.version = ? ORDER BY r.idx",
+                    (thread_id, checkpoint_ns, channel, str(version)),
+                ).fetchall()
+                channel_values[channel] = [self.serde.loads_typed(r) for r in rows]
+            else:
+                channel_values[channel] = self.serde.loads_typed(row)
+        return channel_values
+
+    def _tuple(self, cur, thread_id: str, checkpoint_ns: str, row) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata_type, metadata = row
+        checkpoint_: Checkpoint = self.serde.loads_typed((type_, checkpoint))
+        writes = cur.execute(
+            "SELECT task_id, channel, type, blob FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY rowid",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint_,
+                "channel_values": self._load_blobs(cur, thread_id, checkpoint_ns, checkpoint_["channel_versions"]),
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((t, b))) for task_id, channel, t, b in writes],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+        )
+
+    # -------------------------------
+    # BaseCheckpointSaver API
+    # -------------------------------
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id: str = config["configurable"]["thread_id"]
+        checkpoint_ns: str = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+            "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params = [thread_id, checkpoint_ns]
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self.lock:
+            cur = self.conn.cursor()
+            row = cur.execute(query, params).fetchone()
+            if row is None:
+                return None
+            return self._tuple(cur, thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints WHERE 1 = 1"
+        )
+        params = []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            params.append(before_checkpoint_id)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+
+        with self.lock:
+            cur = self.conn.cursor()
+            rows = cur.execute(query, params).fetchall()
+            results = []
+            for thread_id, checkpoint_ns, *row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                metadata = self.serde.loads_typed((row[4], row[5]))
+                if filter and not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+                results.append(self._tuple(cur, thread_id, checkpoint_ns, row))
+        yield from results
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        c = checkpoint.copy()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        values: dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        type_, serialized = self.serde.dumps_typed(c)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self.lock, self.conn:
+            cur = self.conn.cursor()
+            for channel, version in new_versions.items():
+                if channel in values:
+                    blob_type, blob = self._dump_value(cur, thread_id, checkpoint_ns, channel, str(version), values[channel])
+                else:
+                    blob_type, blob = "empty", b""
+                cur.execute(
+                    "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, channel, str(version), blob_type, blob),
+                )
+            cur.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),  # parent
+                    type_,
+                    serialized,
+                    metadata_type,
+                    serialized_metadata,
+                    json.dumps({k: str(v) for k, v in checkpoint["channel_versions"].items()}),
+                ),
+            )
+            self._compact(cur, thread_id, checkpoint_ns)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self.lock, self.conn:
+            cur = self.conn.cursor()
+            for idx, (channel, value) in enumerate(writes):
+                write_idx = WRITES_IDX_MAP.get(channel, idx)
+                # Regular writes are only recorded once, special ones (errors, interrupts) are replaced
+                verb = "INSERT OR REPLACE" if write_idx < 0 else "INSERT OR IGNORE"
+                type_, blob = self.serde.dumps_typed(value)
+                cur.execute(
+                    f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint_id, task_id, write_idx, channel, type_, blob, task_path),
+                )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self.lock, self.conn:
+            hashes = {row[0] for row in self.conn.execute("SELECT DISTINCT hash FROM message_refs WHERE thread_id = ?", (thread_id,))}
+            for table in ("checkpoints", "blobs", "message_refs", "writes"):
+                self.conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._drop_orphans(self.conn.cursor(), hashes)
+
+    @staticmethod
+    def _drop_orphans(cur, hashes: set[str]):
+        """Delete the messages among `hashes` that no ref points to any more (looked up by the hash index)."""
+        cur.executemany(
+            "DELETE FROM messages WHERE hash = ? AND NOT EXISTS (SELECT 1 FROM message_refs WHERE hash = ?)",
+            ((digest, digest) for digest in hashes),
+        )
+
+    def _compact(self, cur, thread_id: str, checkpoint_ns: str):
+        """Drop checkpoints past the retention window and everything only they referenced."""
+        stale = cur.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+            (thread_id, checkpoint_ns, self.retention),
+        ).fetchall()
+        if not stale:
+            return
+        for (checkpoint_id,) in stale:
+            cur.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            )
+            cur.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            )
+
+        # Channel versions still referenced by the retained checkpoints
+        live, hashes = set(), set()
+        for (versions,) in cur.execute(
+            "SELECT channel_versions FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+            (thread_id, checkpoint_ns),
+        ).fetchall():
+            live.update(json.loads(versions).items())
+        for channel, version in cur.execute(
+            "SELECT channel, version FROM blobs WHERE thread_id = ? AND checkpoint_ns = ?",
+            (thread_id, checkpoint_ns),
+        ).fetchall():
+            if (channel, version) in live:
+                continue
+            # Only messages of the dropped versions can have become orphans
+            hashes.update(row[0] for row in cur.execute(
+                "SELECT hash FROM message_refs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, version),
+            ).fetchall())
+            for table in ("blobs", "message_refs"):
+                cur.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                    (thread_id, checkpoint_ns, channel, version),
+                )
+        self._drop_orphans(cur, hashes)
+
+    # -------------------------------
+    # Async API, SQLite work runs on a worker thread
+    # -------------------------------
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        next_v = current_v + 1
+        next_h = random.random()
+        return f"{next_v:032}.{next_h:016}"
+
+
+_checkpointer: BaseCheckpointSaver = None
+
+
+def get_checkpointer(kind: str = CHECKPOINTER) -> BaseCheckpointSaver:
+    """Return the process wide checkpointer ("sqlite" or "memory")."""
+    global _checkpointer
+    if _checkpointer is None:
+        if kind == "memory":
+            _checkpointer = InMemorySaver()
+        elif kind == "sqlite":
+            _checkpointer = SqliteCheckpointer()
+        else:
+            raise ValueError(f"Checkpointer {kind} not registered")
+    return _checkpointer
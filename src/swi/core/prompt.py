@@ -1,11 +1,21 @@
 
+import hashlib
+from functools import lru_cache
+
 from jinja2 import Template
 from swi.core.tools.file_tool import FILE
 from swi.core.tools.shell_tool import SHELL
 from swi.core.tools.fetch_tool import FETCH
+from swi.core.tools.code_tool import CODE
+from swi.core.tools.memory_tool import MEMORY
+from swi.core.tools.artifact_tool import ARTIFACT
 
+import os
 import platform
-from swi.utils.helper import get_folder_tree
+from swi.utils.tree_index import get_tree_index
+from swi.utils.bm25 import get_bm25_index, best_window
+from swi.utils.helper import read_text_file
+from swi.utils.config import RETRIEVE_TOP_K, RETRIEVE_TOKEN_BUDGET, RETRIEVE_SNIPPET_LINES
 
 
 def get_system_context() -> str:
@@ -35,9 +45,6 @@ def get_system_context() -> str:
 
 mcp_prompt = Template("""You are an interactive CLI agent specializing in software engineering tasks. Your primary goal is to help users safely and efficiently  write,edit or modify code based on user query, adhering strictly to the following instructions and utilizing your available tools.                                                            
 
-# Project Structure 
-{{ project_structure }}                    
-                      
 # Core Mandates
 - **Conventions:** Rigorously adhere to existing project conventions when reading or modifying code. Analyze surrounding code, tests, and configuration first.
 - **Libraries/Frameworks:** NEVER assume a library/framework is available or appropriate. Verify its established usage within the project (check imports, configuration files like 'package.json', 'Cargo.toml', 'requirements.txt', 'build.gradle', etc., or observe neighboring files) before employing it.
@@ -53,9 +60,9 @@ mcp_prompt = Template("""You are an interactive CLI agent specializing in softwa
 # Primary Workflows
 ## Software Engineering Tasks
 When requested to perform tasks like fixing bugs, adding features, refactoring, or explaining code, follow this sequence:
-1. **Understand:** Think about the user's request and the relevant codebase context. Use {{ GET_FOLDER_STRUCTURE }} to understand file structures, existing code patterns, and conventions. Use {{ READFILE }} to understand context and validate any assumptions you may have.
+1. **Understand:** Think about the user's request and the relevant codebase context. Use {{ GET_FOLDER_STRUCTURE }} to understand file structures, existing code patterns, and conventions. Use {{ SEARCH }}, {{ OUTLINE }} and {{ DEFINITION }} to locate definitions and usages without reading whole files. Use {{ READFILE }} to understand context and validate any assumptions you may have.
 2. **Plan:** Build a coherent and grounded (based on the understanding in step 1) plan for how you intend to resolve the user's task. Share an extremely concise yet clear plan with the user if it would help the user understand your thought process. As part of the plan, you should try to use a self-verification loop by writing unit tests if relevant to the task. Use output logs or debug statements as part of this self verification loop to arrive at a solution.
-3. **Implement:** Use the available tools (e.g., {{ EDIT_TOOL }} to edit code, {{ WRITEFILE }}  to write code {{ SHELL }}and to execute the code ...) to act on the plan, strictly adhering to the project's established conventions (detailed under 'Core Mandates').
+3. **Implement:** Use the available tools (e.g., {{ EDIT_TOOL }} to edit code, {{ MULTI_EDIT }} to apply many edits as one change, {{ WRITEFILE }}  to write code {{ SHELL }}and to execute the code ...) to act on the plan, strictly adhering to the project's established conventions (detailed under 'Core Mandates').
 5 **Create required Directory** using {{ SHELL }} tools write the command to create the directory                      
 4. **Verify (Tests):** If applicable and feasible, verify the changes using the project's testing procedures. Identify the correct test commands and frameworks by examining 'README' files, build/package configuration (e.g., 'package.json'), or existing test execution patterns. NEVER assume standard test commands.
 5. **Verify (Standards):** VERY IMPORTANT: After making code changes, execute the project-specific build, linting and type-checking commands (e.g., 'tsc', 'npm run lint', 'ruff check .') that you have identified for this project (or obtained from the user). This ensures code quality and adherence to standards. If unsure about these commands, you can ask the user if they'd like you to run them and if so how to.
@@ -97,9 +104,11 @@ When requested to perform tasks like fixing bugs, adding features, refactoring,
 ## Tool Usage
 - **File Paths:** Always use absolute paths when referring to files with tools like {{ READFILE }} or {{ WRITEFILE }}. Relative paths are not supported. You must provide an absolute path.
 - **Parallelism:** Execute multiple independent tool calls in parallel when feasible (i.e. searching the codebase).
+- **Searching Code:** Use {{ SEARCH }} to find code, {{ DEFINITION }} to jump to a symbol and {{ OUTLINE }} to see the structure of a file, then read only the relevant line ranges with {{ READFILE }} (start_line/end_line).
+- **Large Outputs:** Tool results that are too large are stored as artifacts and shown as a preview with a handle (e.g. art_0123456789abcdef). Use {{ READ_ARTIFACT }} to read only the lines you need instead of running the tool again.
 - **Command Execution:** Use the {{ SHELL }} tool for running shell commands, remembering the safety rule to explain modifying commands first.
 - **Interactive Commands:** Try to avoid shell commands that are likely to require user interaction (e.g. \`git rebase -i\`). Use non-interactive versions of commands (e.g. \`npm init -y\` instead of \`npm init\`) when available, and otherwise remind the user that interactive shell commands are not supported and may cause hangs until canceled by the user.
-- **Remembering Facts:** Use the {{ MEMORY }} tool to remember specific, *user-related* facts or preferences when the user explicitly asks, or when they state a clear, concise piece of information that would help personalize or streamline *your future interactions with them* (e.g., preferred coding style, common project paths they use, personal tool aliases). This tool is for user-specific information that should persist across sessions. Do *not* use it for general project context or information. If unsure whether to save something, you can ask the user, "Should I remember that for you?"
+- **Remembering Facts:** Use the {{ MEMORY }} tool to remember specific, *user-related* facts or preferences when the user explicitly asks, or when they state a clear, concise piece of information that would help personalize or streamline *your future interactions with them* (e.g., preferred coding style, common project paths they use, personal tool aliases). This tool is for user-specific information that should persist across sessions. Do *not* use it for general project context or information. If unsure whether to save something, you can ask the user, "Should I remember that for you?" Use {{ RECALL }} with a few keywords to look up remembered facts before asking the user for something they may have told you before.
 - **Respect User Confirmations:** Most tool calls (also denoted as 'function calls') will first require confirmation from the user, where they will either approve or cancel the function call. If a user cancels a function call, respect their choice and do _not_ try to make the function call again. It is okay to request the tool call again _only_ if the user requests that same tool call on a subsequent prompt. When a user cancels a function call, assume best intentions from the user and consider inquiring if they prefer any alternative paths forward.
 - **Download Data from Web** user {{ FETCH }} to fetch data from web if the webpage is not reachable ask suggest user an alternate plan 
 
@@ -232,6 +241,11 @@ To help you check their settings, I can read their contents. Which one would you
 
 """)
 
+# Everything that changes between calls lives here, after the conversation,
+# so the static system prompt plus history stay a cacheable prefix.
+context_prompt = Template("""# Project Structure
+{{ project_structure }}""")
+
 compress_prompt = """You are the component that summarizes internal chat history into a given structure.
 
 When the conversation history grows too large, you will be invoked to distill the entire history into a concise, structured XML snapshot. This snapshot is CRITICAL, as it will become the agent's *only* memory of the past. The agent will resume its work based solely on this snapshot. All crucial details, plans, errors, and user directives MUST be preserved.
@@ -289,17 +303,71 @@ The structure MUST be as follows:
 </state_snapshot>"""
 
 
-def get_prompt():
-    """Generates the prompt with the folder structure in the context"""
-    prompt = mcp_prompt.render(
+@lru_cache(maxsize=1)
+def get_static_prompt() -> str:
+    """
+    Render the instructions, tool names and system info once per process.
+
+    The result must stay byte for byte identical between calls, providers only
+    reuse cached input tokens for an exact prefix match.
+    """
+    return mcp_prompt.render(
         READFILE=FILE.READFILE.value,
         GET_FOLDER_STRUCTURE=FILE.GET_FOLDER_STRUCTURE.value,
         EDIT_TOOL=FILE.EDIT_TOOL.value,
+        MULTI_EDIT=FILE.MULTI_EDIT.value,
         WRITEFILE=FILE.WRITEFILE.value,
-        MEMORY=FILE.NOTEPAD.value,
+        MEMORY=MEMORY.NOTE.value,
+        RECALL=MEMORY.RECALL.value,
         SHELL=SHELL.SHELL.value,
         FETCH=FETCH.URL.value,
+        SEARCH=CODE.SEARCH.value,
+        OUTLINE=CODE.OUTLINE.value,
+        DEFINITION=CODE.DEFINITION.value,
+        READ_ARTIFACT=ARTIFACT.READ.value,
         system=get_system_context(),
-        project_structure=get_folder_tree(root_dir="./"),
     )
-    return prompt
\ No newline at end of file
+
+
+@lru_cache(maxsize=1)
+def get_prompt_cache_key() -> str:
+    """Stable key for the static prompt, used as a provider cache routing hint."""
+    return "swi-" + hashlib.sha256(get_static_prompt().encode("utf-8")).hexdigest()[:16]
+
+
+def get_context() -> str:
+    """Generates the volatile tail with the current folder structure"""
+    return context_prompt.render(project_structure=get_tree_index("./").snapshot())
+
+
+def get_retrieved(query: str, k: int = RETRIEVE_TOP_K, token_budget: int = RETRIEVE_TOKEN_BUDGET) -> tuple[str, list[str]]:
+    """
+    Snippets of the files most relevant to `query` within a token budget (~4 chars per token), and their paths.
+
+    The index is refreshed on a background thread and ranking reads its last
+    commit, so a turn never waits for a walk. Nothing is retrieved while the
+    first index build is still running.
+    """
+    index = get_bm25_index("./")
+    index.start_refresh(force=False)
+    if not index.ready:
+        return "", []
+    budget = token_budget * 4
+    parts, paths = [], []
+    for rel_path, _score, terms in index.search(query, k):
+        data = read_text_file(os.path.join(index.root, rel_path))
+        if not data or budget <= 0:
+            continue
+        first, snippet = best_window(data.decode("utf-8", "replace"), terms, RETRIEVE_SNIPPET_LINES)
+        last = first + snippet.count("\n")
+        header = f"## {rel_path} (lines {first}-{last}, matched: {', '.join(terms)})\n"
+        snippet = snippet[:max(budget - len(header), 0)]
+        parts.append(f"{header}```\n{snippet}\n```")
+        budget -= len(header) + len(snippet)
+        paths.append(rel_path)
+    return "\n\n".join(parts), paths
+
+
+def get_prompt():
+    """Generates the full prompt, static block followed by the volatile tail"""
+    return get_static_prompt() + "\n\n" + get_context()
@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import asyncio
+from enum import Enum
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.config import get_stream_writer
+from langgraph.errors import GraphBubbleUp
+from swi.utils.config import TOOL_CONCURRENCY, TOOL_CLASS_LIMITS, ARTIFACT_THRESHOLD_BYTES, ARTIFACT_EXEMPT_TOOLS
+from swi.utils.tracing import tracer
+from swi.utils.artifacts import get_artifact_store, preview
+
+
+class ToolClass(Enum):
+    IO = "io"
+    SUBPROCESS = "subprocess"
+    MUTATING = "mutating"
+
+
+# Tool name -> class. Unknown tools are treated as IO bound.
+TOOL_CLASSES = {
+    "get_file_content": ToolClass.IO,
+    "fetch_url_content": ToolClass.IO,
+    "search_code": ToolClass.IO,
+    "outline_file": ToolClass.IO,
+    "find_definition": ToolClass.IO,
+    "recall": ToolClass.IO,
+    "read_artifact": ToolClass.IO,
+    "shell_tool": ToolClass.SUBPROCESS,
+    "write_file_tool": ToolClass.MUTATING,
+    "edit_file": ToolClass.MUTATING,
+    "edit_files": ToolClass.MUTATING,
+    "note_pad": ToolClass.MUTATING,
+}
+
+
+class ToolExecutor:
+    """
+    Graph node running the tool calls of the last AI message concurrently.
+
+    Every call takes a slot from the global limit and from its class limit.
+    Mutating calls also lock the path they touch, so two edits of the same
+    file never interleave. Results keep the order of the tool calls and
+    carry their duration in `response_metadata`. Results larger than
+    ARTIFACT_THRESHOLD_BYTES go to the artifact store and the message keeps
+    only a handle and a preview.
+    """
+
+    def __init__(self, tools, concurrency: int = TOOL_CONCURRENCY, class_limits: dict = None):
+        self.tools_by_name = {tool.name: tool for tool in tools}
+        self.concurrency = concurrency
+        self.class_limits = {**TOOL_CLASS_LIMITS, **(class_limits or {})}
+        self._path_locks: dict[str, asyncio.Lock] = {}
+
+    def _path_key(self, tool_call: dict) -> str:
+        path = tool_call["args"].get("path")
+        if not path:
+            return tool_call["name"]
+        return os.path.abspath(path if os.path.isabs(path) else os.path.join(os.getcwd(), path.lstrip("/")))
+
+    def _offload(self, message: ToolMessage) -> str:
+        """Move a large result to the artifact store. Returns the handle, or None if it stays inline."""
+        if message.name in ARTIFACT_EXEMPT_TOOLS or not isinstance(message.content, str):
+            return None
+        size = len(message.content.encode("utf-8", "replace"))
+        if size <= ARTIFACT_THRESHOLD_BYTES:
+            return None
+        handle = get_artifact_store(os.getcwd()).put(message.content)
+        head, lines = preview(message.content)
+        message.content = (
+            f"[Output stored as artifact {handle}: {lines:,} lines, {size:,} bytes. Only a preview is shown; "
+            f"read more with read_artifact(handle=\"{handle}\", start_line=..., end_line=...).]\n{head}"
+        )
+        message.response_metadata["artifact"] = handle
+        return handle
+
+    async def _run(self, tool_call: dict, semaphores: dict, writer) -> ToolMessage:
+        name = tool_call["name"]
+        tool = self.tools_by_name.get(name)
+        if tool is None:
+            return ToolMessage(
+                content=f"Error: {name} is not a valid tool, try one of [{', '.join(self.tools_by_name)}].",
+                name=name,
+                tool_call_id=tool_call["id"],
+                status="error",
+            )
+
+        tool_class = TOOL_CLASSES.get(name, ToolClass.IO)
+        with tracer.span(f"tool:{name}", tool_class=tool_class.value) as span:
+            if tracer.enabled:
+                span.set(bytes_in=len(json.dumps(tool_call["args"], default=str)))
+            queued = time.perf_counter()
+            async with semaphores["all"], semaphores[tool_class]:
+                lock = None
+                if tool_class is ToolClass.MUTATING:
+                    lock = self._path_locks.setdefault(self._path_key(tool_call), asyncio.Lock())
+                    await lock.acquire()
+                start = time.perf_counter()
+                try:
+                    message = await tool.ainvoke({**tool_call, "type": "tool_call"})
+                except GraphBubbleUp:
+                    raise
+                except Exception as e:
+                    message = ToolMessage(
+                        content=f"Error: {e!r}\n Please fix your mistakes.",
+                        name=name,
+                        tool_call_id=tool_call["id"],
+                        status="error",
+                    )
+                finally:
+                    if lock is not None:
+                        lock.release()
+                elapsed = time.perf_counter() - start
+
+            if not isinstance(message, ToolMessage):
+                message = ToolMessage(content=str(message), name=name, tool_call_id=tool_call["id"])
+            if handle := await asyncio.to_thread(self._offload, message):
+                span.set(artifact=handle)
+                writer(f"{name} output stored as {handle}")
+            if tracer.enabled:
+                content = message.content if isinstance(message.content, str) else json.dumps(message.content, default=str)
+                span.set(
+                    wait_ms=(start - queued) * 1000,
+                    bytes_out=len(content.encode("utf-8", "replace")),
+                    status=message.status,
+                )
+        message.response_metadata["duration"] = elapsed
+        writer(f"{name} finished in {elapsed:.2f}s")
+        return message
+
+    async def __call__(self, state: dict):
+        messages = state.get("messages", [])
+        ai_message = next((m for m in reversed(messages) if isinstance(m, AIMessage)), None)
+        if ai_message is None or not ai_message.tool_calls:
+            return {"messages": []}
+
+        writer = get_stream_writer()
+        semaphores = {"all": asyncio.Semaphore(self.concurrency)}
+        for tool_class in ToolClass:
+            semaphores[tool_class] = asyncio.Semaphore(self.class_limits.get(tool_class.value, self.concurrency))
+
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._run(tool_call, semaphores, writer) for tool_call in ai_message.tool_calls),
+            return_exceptions=True,
+        )
+        for result in results:
+            # Interrupts (approval prompts) and other graph signals must reach the graph
+            if isinstance(result, BaseException):
+                raise result
+
+        if len(results) > 1:
+            writer(f"{len(results)} tool calls finished in {time.perf_counter() - start:.2f}s")
+        return {"messages": results}
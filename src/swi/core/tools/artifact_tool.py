@@ -0,0 +1,52 @@
+import os
+import asyncio
+from langchain_core.tools import tool
+from langgraph.config import get_stream_writer
+from swi.utils.config import ARTIFACT_READ_MAX_BYTES
+from swi.utils.artifacts import get_artifact_store, slice_text
+
+
+
+from enum import Enum
+class ARTIFACT(Enum):
+    READ = "read_artifact"
+
+
+def _read(handle: str, start_line: int, end_line: int, offset: int, length: int) -> str:
+    try:
+        text = get_artifact_store(os.getcwd()).read(handle)
+    except (ValueError, FileNotFoundError) as e:
+        return f"Error: {e}"
+    part, description = slice_text(text, start_line, end_line, offset, length)
+    data = part.encode("utf-8", "replace")
+    if len(data) > ARTIFACT_READ_MAX_BYTES:
+        part = data[:ARTIFACT_READ_MAX_BYTES].decode("utf-8", "ignore")
+        description += f", cut at {ARTIFACT_READ_MAX_BYTES:,} bytes, request a smaller range"
+    return f"[{handle} {description}]\n{part}"
+
+
+@tool
+async def read_artifact(
+    handle: str,
+    start_line: int = None,
+    end_line: int = None,
+    offset: int = None,
+    length: int = None,
+) -> str:
+    """
+    Read part of a large tool output that was stored as an artifact (handles look like 'art_0123456789abcdef').
+    Ask only for the lines or bytes you need.
+
+    Args:
+        handle (str): Artifact handle from the tool output
+        start_line (int): First line to read, 1-based (optional)
+        end_line (int): Last line to read, inclusive (optional)
+        offset (int): Byte offset to start from when no line range is given (optional)
+        length (int): Number of bytes to read from offset (optional)
+
+    Returns:
+            str: '[handle range]' header followed by the requested text
+    """
+    writer = get_stream_writer()
+    writer(f"Reading artifact: {handle}")
+    return await asyncio.to_thread(_read, handle, start_line, end_line, offset, length)
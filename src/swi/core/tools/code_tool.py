@@ -0,0 +1,184 @@
+import os
+import re
+import time
+import fnmatch
+import asyncio
+from langchain_core.tools import tool
+from langgraph.config import get_stream_writer
+from swi.utils.config import SEARCH_MAX_RESULTS, SEARCH_CONTEXT_LINES, SEARCH_MAX_BYTES, OUTLINE_MAX_SYMBOLS
+from swi.utils.trigram_index import get_trigram_index, required_literals
+from swi.utils.symbols import get_symbol_index
+from swi.core.tools.file_tool import FILE, _resolve
+
+
+
+from enum import Enum
+class CODE(Enum):
+    SEARCH = "search_code"
+    OUTLINE = "outline_file"
+    DEFINITION = "find_definition"
+
+
+def _search(query: str, regex: bool, case_sensitive: bool, path_glob: str, context_lines: int, max_results: int) -> str:
+    index = get_trigram_index(os.getcwd())
+    index.refresh()
+
+    flags = 0 if case_sensitive else re.IGNORECASE
+    pattern = query if regex else re.escape(query)
+    try:
+        compiled = re.compile(pattern, flags | re.MULTILINE)
+    except re.error as e:
+        return f"Error: invalid regex {query!r}: {e}"
+    literals = required_literals(pattern, flags) if regex else ([query] if len(query) >= 3 else [])
+    path_filter = (lambda rel_path: fnmatch.fnmatch(rel_path, path_glob)) if path_glob else None
+
+    out, size, matches, files = [], 0, 0, set()
+    for rel_path, block in index.search(compiled, literals, context_lines, max_results, path_filter):
+        files.add(rel_path)
+        lines = []
+        for number, line, is_match in block:
+            matches += is_match
+            # grep style: ':' marks a match, '-' a context line
+            lines.append(f"{rel_path}{':' if is_match else '-'}{number}{':' if is_match else '-'} {line}")
+        text = "\n".join(lines)
+        if size + len(text) > SEARCH_MAX_BYTES:
+            out.append("… [output budget reached, narrow the query or the path_glob]")
+            break
+        out.append(text)
+        size += len(text)
+
+    # Vendored and generated files are dropped from a full index, say so
+    left_out = index.left_out()
+    note = f", {left_out} vendored or generated file(s) not searched" if left_out else ""
+    if not out:
+        return f"No matches for {query!r}{note}"
+    summary = f"{matches} matching line(s) in {len(files)} file(s)"
+    if matches >= max_results:
+        summary += f", stopped at max_results={max_results}"
+    return "\n--\n".join(out) + f"\n\n[{summary}{note}]"
+
+
+@tool
+async def search_code(
+    query: str,
+    regex: bool = False,
+    case_sensitive: bool = False,
+    path_glob: str = None,
+    context_lines: int = SEARCH_CONTEXT_LINES,
+    max_results: int = SEARCH_MAX_RESULTS,
+) -> str:
+    """
+    Search the project for code, returning only the matching lines with a few lines of context.
+    Prefer this over reading whole files or running grep to find where something is defined or used.
+
+    Args:
+        query (str): Text to find, or a Python regular expression when regex is true
+        regex (bool): Treat the query as a regular expression (matched line by line)
+        case_sensitive (bool): Match case exactly (default: case-insensitive)
+        path_glob (str): Only search files whose project relative path matches, e.g. 'src/**/*.py' (optional)
+        context_lines (int): Lines shown before and after each match
+        max_results (int): Maximum number of matching lines
+
+    Returns:
+            str: 'path:line: text' for matches and 'path-line- text' for context, blocks separated by '--'
+    """
+    writer = get_stream_writer()
+    writer(f"Searching code for: {query}")
+    start = time.perf_counter()
+    result = await asyncio.to_thread(
+        _search, query, regex, case_sensitive, path_glob, max(context_lines, 0), max(1, min(max_results, 500))
+    )
+    writer(f"Search finished in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return result
+
+
+def _outline(path: str, max_symbols: int) -> str:
+    abs_path = _resolve(path)
+    symbols = get_symbol_index(os.getcwd()).file_symbols(abs_path)
+    if symbols.error:
+        return f"Error: {symbols.error}"
+    if not symbols.symbols:
+        return f"No definitions in {abs_path}"
+    lines = [f"{abs_path}"]
+    for symbol in symbols.symbols[:max_symbols]:
+        span = f"L{symbol.start_line}" if symbol.start_line == symbol.end_line else f"L{symbol.start_line}-{symbol.end_line}"
+        lines.append(f"{'  ' * symbol.depth}{span} {symbol.signature[:160]}")
+    if len(symbols.symbols) > max_symbols:
+        lines.append(f"… {len(symbols.symbols) - max_symbols} more definitions")
+    lines.append(f"Read a definition with {FILE.READFILE.value}(path, start_line, end_line).")
+    return "\n".join(lines)
+
+
+def _definition(symbol: str, path: str, include_references: bool) -> str:
+    cwd = os.getcwd()
+    index = get_symbol_index(cwd)
+    if path:
+        paths = [_resolve(path)]
+    else:
+        trigram_index = get_trigram_index(cwd)
+        trigram_index.refresh()
+        short = symbol.rsplit(".", 1)[-1]
+        paths = [
+            os.path.join(trigram_index.root, rel_path)
+            for rel_path in trigram_index.candidates([short] if len(short) >= 3 else [])
+            if index.supports(rel_path)
+        ]
+
+    found = index.definitions(symbol, paths)
+    lines = [
+        f"{def_path}:{item.start_line}-{item.end_line} {item.kind} {item.qualname}: {item.signature[:160]}"
+        for def_path, item in found[:50]
+    ]
+    if len(found) > 50:
+        lines.append(f"… {len(found) - 50} more definitions, pass `path` to narrow down")
+    if not lines:
+        lines.append(f"No definition of {symbol!r} found")
+    if include_references:
+        references = index.references(symbol, paths)
+        lines.append(f"\n{len(references)} reference(s):")
+        lines.extend(f"{ref_path}:{line}" for ref_path, line in references[:100])
+        if len(references) > 100:
+            lines.append(f"… {len(references) - 100} more")
+    return "\n".join(lines)
+
+
+@tool
+async def outline_file(path: str, max_symbols: int = OUTLINE_MAX_SYMBOLS) -> str:
+    """
+    List the classes, functions, methods and module variables of a source file with their signatures and line ranges.
+    Much cheaper than reading the file; read only the range you need afterwards.
+
+    Args:
+        path (str): Absolute path of the file
+        max_symbols (int): Maximum number of definitions listed
+
+    Returns:
+            str: One line per definition, 'L<start>-<end> <signature>', indented by nesting
+    """
+    writer = get_stream_writer()
+    writer(f"Outlining: {path}")
+    try:
+        return await asyncio.to_thread(_outline, path, max(1, max_symbols))
+    except OSError as e:
+        return f"Error: {e}"
+
+
+@tool
+async def find_definition(symbol: str, path: str = None, include_references: bool = False) -> str:
+    """
+    Go to the definition of a class, function, method or variable.
+
+    Args:
+        symbol (str): Name or dotted name, e.g. 'CodingAgent' or 'CodingAgent.call_model'
+        path (str): Only look in this file (optional, default: whole project)
+        include_references (bool): Also list the lines where the name is used
+
+    Returns:
+            str: 'path:start-end kind qualname: signature' per definition
+    """
+    writer = get_stream_writer()
+    writer(f"Finding definition of: {symbol}")
+    try:
+        return await asyncio.to_thread(_definition, symbol, path, include_references)
+    except OSError as e:
+        return f"Error: {e}"
@@ -1,15 +1,150 @@
+import os
+import json
+import asyncio
+import hashlib
+from html.parser import HTMLParser
+
+import httpx
 from langchain_core.tools import tool
-import requests
 from langgraph.config import get_stream_writer
 from langgraph.types import  interrupt
+from swi.utils.config import (
+    CACHE_DIR,
+    HTTP_CACHE_DIR,
+    FETCH_CONCURRENCY,
+    FETCH_TIMEOUT,
+    FETCH_MAX_BYTES,
+    FETCH_MAX_CHARS,
+)
 
 from enum import Enum
 class FETCH(Enum):
     URL = "fetch_url_content"
-    
+
+
+class _TextExtractor(HTMLParser):
+    """Collects the visible text of an HTML page."""
+
+    SKIP = {"script", "style", "noscript", "svg", "template"}
+    BLOCK = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "section", "article"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag in self.BLOCK:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self._skip = max(self._skip - 1, 0)
+        elif tag in self.BLOCK:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """Strip tags, scripts and styles and collapse whitespace."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    lines = (" ".join(line.split()) for line in "".join(parser.parts).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class HttpCache:
+    """On-disk cache of fetched pages, revalidated with ETag / Last-Modified."""
+
+    def __init__(self, folder: str = None):
+        self.folder = folder or os.path.join(CACHE_DIR, HTTP_CACHE_DIR)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.folder, hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def get(self, url: str):
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, entry: dict):
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            tmp_path = self._path(url) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(url))
+        except OSError:
+            pass
+
+
+_client: httpx.AsyncClient = None
+_client_loop = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Shared connection pool for the running event loop."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=FETCH_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=FETCH_CONCURRENCY * 2, max_keepalive_connections=FETCH_CONCURRENCY),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def fetch_url(url: str, cache: HttpCache = None) -> tuple[bool, str]:
+    """
+    Fetch a single URL, reading at most FETCH_MAX_BYTES of the body.
+
+    Returns:
+        tuple[bool, str]: (available, text or reason)
+    """
+    cache = cache or HttpCache()
+    cached = cache.get(url)
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    async with get_client().stream("GET", url, headers=headers) as response:
+        if response.status_code == 304 and cached:
+            return True, cached["content"]
+        if response.status_code != 200:
+            return False, f"not available (status code {response.status_code})"
+
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body.extend(chunk)
+            if len(body) >= FETCH_MAX_BYTES:
+                break
+        text = bytes(body[:FETCH_MAX_BYTES]).decode(response.charset_encoding or "utf-8", errors="replace")
+        if "html" in response.headers.get("content-type", ""):
+            text = html_to_text(text)
+        text = text[:FETCH_MAX_CHARS]
+
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if etag or last_modified:
+            cache.put(url, {"etag": etag, "last_modified": last_modified, "content": text})
+        return True, text
+
 
 @tool()
-def fetch_url_content(urls: list[str]) -> dict:
+async def fetch_url_content(urls: list[str]) -> dict:
     """
     Downloads content from the given list of URLs.
 
@@ -19,22 +154,20 @@ def fetch_url_content(urls: list[str]) -> dict:
     Returns:
         dict: A dictionary where keys are URLs and values are either the content or 'not available'.
     """
-    results = {}
     writer = get_stream_writer()
-    for url in urls:
-        try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                results[url] = response.text[:1000]  # limit size for safety
-                writer(f"Downloaded {url}")
-            else:
-                results[url] = f"not available (status code {response.status_code})"
-                writer(f"not available {url}")
-        except Exception as e:
-            results[url] = f"not available ({str(e)})"
-            writer(f"not available {url}")
+    cache = HttpCache()
+    semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+
+    async def fetch(url):
+        async with semaphore:
+            try:
+                available, content = await fetch_url(url, cache)
+            except Exception as e:
+                available, content = False, f"not available ({str(e)})"
+        writer(f"Downloaded {url}" if available else f"not available {url}")
+        return url, content
 
-    return results
+    return dict(await asyncio.gather(*(fetch(url) for url in urls)))
 
 
 @tool
@@ -47,4 +180,4 @@ def ask_user(question:str):
     """
     
     human_response = interrupt(question)
-    return human_response
\ No newline at end of file
+    return human_response
@@ -1,12 +1,16 @@
 import os
 import re
-import glob
+import mmap
 import difflib
+import tempfile
 
 from langchain_core.tools import tool
 from langgraph.config import get_stream_writer
-from swi.utils.config import NOTEPAD
+from swi.utils.config import IGNORE_DIRS, READ_MAX_BYTES, READ_MAX_FILES, READ_MMAP_THRESHOLD
+from swi.utils.helper import GitIgnore, compile_glob
+from swi.utils.file_cache import file_cache
 from langgraph.types import  interrupt
+from pydantic import BaseModel
 
 
 
@@ -16,58 +20,185 @@ class FILE(Enum):
     WRITEFILE = "write_file_tool"
     GET_FOLDER_STRUCTURE = "folder_structure" 
     EDIT_TOOL = "edit_tool"
-    NOTEPAD = "note_pad"
+    MULTI_EDIT = "edit_files"
+
+
+def _resolve(path: str) -> str:
+    """Absolute paths are kept when they exist, anything else is relative to the cwd."""
+    if os.path.isabs(path) and os.path.exists(path):
+        return path
+    return os.path.join(os.getcwd(), path.lstrip("/"))
+
+
+def _approved(human_response) -> bool:
+    """True when the answer to a permission interrupt is a yes ("y", "yes", ...)."""
+    return str(human_response).strip().lower().startswith("y")
+
+
+def _is_binary(sample: bytes) -> bool:
+    return b"\0" in sample
+
+
+def _line_offset(data, line: int) -> int:
+    """Byte offset where `line` (1-based) starts, or len(data) past the end."""
+    pos = 0
+    for _ in range(line - 1):
+        pos = data.find(b"\n", pos)
+        if pos == -1:
+            return len(data)
+        pos += 1
+    return pos
+
+
+def _read_range(abs_path: str, start_line: int = None, end_line: int = None, offset: int = None, budget: int = READ_MAX_BYTES) -> tuple[str, int]:
+    """
+    Read part of a file without loading more than needed.
+
+    Small files go through the shared file cache. Large files are memory-mapped
+    so only the pages of the requested range are touched.
+
+    Returns:
+        tuple[str, int]: (text, bytes consumed from the budget)
+    """
+    size = os.path.getsize(abs_path)
+    if size > READ_MMAP_THRESHOLD:
+        with open(abs_path, "rb") as f:
+            if _is_binary(f.read(8192)):
+                return f"[Binary file skipped: {abs_path} ({size:,} bytes)]", 0
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    else:
+        data = file_cache.read_bytes(abs_path)
+        if _is_binary(data[:8192]):
+            return f"[Binary file skipped: {abs_path} ({size:,} bytes)]", 0
+        size = len(data)
+
+    try:
+        start = offset or 0
+        if start_line:
+            start = _line_offset(data, start_line)
+        end = size
+        if end_line:
+            end = _line_offset(data, end_line + 1)
+        stop = min(end, start + budget)
+        if stop < end:
+            # Cut on a line boundary when possible
+            newline = data.rfind(b"\n", start, stop)
+            if newline > start:
+                stop = newline + 1
+        text = data[start:stop].decode("utf-8", errors="replace")
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+    if stop < end:
+        text += (
+            f"\n… [truncated: showing bytes {start:,}-{stop:,} of {size:,}. "
+            "Use start_line/end_line or offset to read the rest]"
+        )
+    return text, stop - start
+
+
+def _iter_glob(pattern: str):
+    """
+    Lazily expand a glob, skipping ignored folders and .gitignore matches.
+
+    The walk starts at the literal part of the pattern and never enters an
+    ignored folder (node_modules, .venv, gitignored build output), nor folders
+    deeper than the pattern can match when it has no '**'.
+    """
+    cwd = os.getcwd()
+    gitignore = GitIgnore(cwd)
+    parts = pattern.replace(os.sep, "/").split("/")
+    first = next((i for i, part in enumerate(parts) if re.search(r"[*?\[]", part)), len(parts) - 1)
+    base = _resolve("/".join(parts[:first]) or "/") if first else cwd
+    rest = "/".join(parts[first:])
+    regex = compile_glob(rest)
+    max_depth = None if "**" in rest else rest.count("/")
+    # Like glob, '*' does not match hidden files unless the pattern names them
+    hidden = rest.startswith(".") or "/." in rest
+
+    def ignored(path: str, is_dir: bool) -> bool:
+        rel_path = os.path.relpath(path, cwd)
+        return not rel_path.startswith("..") and gitignore.is_ignored(rel_path, is_dir)
+
+    for folder, dirs, files in os.walk(base):
+        rel_folder = os.path.relpath(folder, base).replace(os.sep, "/")
+        rel_folder = "" if rel_folder == "." else rel_folder + "/"
+        depth = rel_folder.count("/")
+        dirs[:] = sorted(
+            name for name in dirs
+            if (max_depth is None or depth < max_depth)
+            and (hidden or not name.startswith("."))
+            and name not in IGNORE_DIRS
+            and not ignored(os.path.join(folder, name), True)
+        )
+        for name in sorted(files):
+            file_path = os.path.join(folder, name)
+            if (hidden or not name.startswith(".")) and regex.match(rel_folder + name) and not ignored(file_path, False):
+                yield file_path
 
 
 @tool
-async def get_file_content(path: str) -> str:
+async def get_file_content(
+    path: str,
+    start_line: int = None,
+    end_line: int = None,
+    offset: int = None,
+    max_bytes: int = READ_MAX_BYTES,
+) -> str:
     """
     Read file(s) from a given path or glob pattern.
 
     Args:
         path (str): Absolute path OR glob pattern (e.g., '*.txt', 'src/**/*.py')
+        start_line (int): First line to read, 1-based (optional)
+        end_line (int): Last line to read, inclusive (optional)
+        offset (int): Byte offset to start reading from when no start_line is given (optional)
+        max_bytes (int): Byte budget for the whole call; output past it is truncated
 
     Returns:
             str: Concatenated file content(s) or error,
     """
-    cwd = os.getcwd()
     writer = get_stream_writer()
+    budget = min(max_bytes, READ_MAX_BYTES)
 
     writer(f"Reading file(s) from: {path}")
 
     # Case 1: Single file (no glob pattern)
     if not re.search(r'\*', path):
         try:
-            abs_path = os.path.join(cwd, path.lstrip("/"))
+            abs_path = _resolve(path)
             writer(f"Reading file: {abs_path}")
-            with open(abs_path, "r", encoding="utf-8") as f:
-                return f.read()
+            text, _ = _read_range(abs_path, start_line, end_line, offset, budget)
+            writer(file_cache.stats())
+            return text
         except Exception as e:
             writer(f"Error {e} in reading file")
             return "No file available"
 
     # Case 2: Glob pattern
     try:
-        abs_pattern = os.path.join(cwd, path.lstrip("/"))
-        matched_files = glob.glob(abs_pattern, recursive=True)
-
-        writer(f"Matched Files: {matched_files}")
-        if not matched_files:
-            return f"No file for {path} pattern"
-
         contents = []
-        for file_path in matched_files:
-            if os.path.isfile(file_path):
-                try:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        file_content = f.read()
-                    contents.append(f"--- {file_path} ---\n\n{file_content}\n\n")
-                except Exception as e:
-                    err_msg = f"--- {file_path} ---\n\n[Error reading file: {e}]\n\n"
-                    writer(err_msg)
-                    contents.append(err_msg)
-
-        return "".join(contents) if contents else ""
+        matched = 0
+        for file_path in _iter_glob(path):
+            if budget <= 0 or matched >= READ_MAX_FILES:
+                contents.append("… [budget reached, remaining matches were not read. Narrow the pattern]\n")
+                break
+            matched += 1
+            try:
+                file_content, used = _read_range(file_path, start_line, end_line, offset, budget)
+                budget -= used
+                contents.append(f"--- {file_path} ---\n\n{file_content}\n\n")
+            except Exception as e:
+                err_msg = f"--- {file_path} ---\n\n[Error reading file: {e}]\n\n"
+                writer(err_msg)
+                contents.append(err_msg)
+
+        writer(f"Matched Files: {matched}")
+        writer(file_cache.stats())
+        if not matched:
+            return f"No file for {path} pattern"
+        return "".join(contents)
 
     except Exception as e:
         return f"Error: {e}"
@@ -108,13 +239,21 @@ async def write_file_tool(code: str, path: str) -> str:
         # Ensure parent directory exists
         os.makedirs(os.path.dirname(abs_path), exist_ok=True)
 
+        # Nothing to do when the file already has this content. Bytes are
+        # compared, a file that is not valid UTF-8 simply differs
+        if os.path.isfile(abs_path) and file_cache.read_bytes(abs_path) == code.encode("utf-8"):
+            msg = f"File already up to date → {abs_path}"
+            writer(msg)
+            return msg
+
         # Write file
         human_response = interrupt(f"Permission to Write {path}")
-        if not human_response.lower().find("y"):
+        if not _approved(human_response):
             return "User says not to read the file"
         
         with open(abs_path, "w", encoding="utf-8") as f:
             f.write(code)
+        file_cache.invalidate(abs_path)
 
         msg = f"File written successfully → {abs_path}"
         writer(msg)
@@ -165,8 +304,7 @@ def edit_file(path: str, old_string: str, new_string: str, number_of_replacement
         abs_path = path if os.path.isabs(path) else os.path.join(cwd, path.lstrip("/"))
 
         # Read current file
-        with open(abs_path, "r", encoding="utf-8") as f:
-            original_content = f.read()
+        original_content = file_cache.read_text(abs_path)
 
         # Replace content
         updated_content = original_content.replace(old_string, new_string, number_of_replacements)
@@ -192,13 +330,13 @@ def edit_file(path: str, old_string: str, new_string: str, number_of_replacement
 
         # Write file
         human_response = interrupt(f"Permission to Update {diff}")
-        if not human_response.lower().find("y"):
+        if not _approved(human_response):
             return "User says not to edit the file"
         # Write updated content
         with open(abs_path, "w", encoding="utf-8") as f:
             f.write(updated_content)
+        file_cache.invalidate(abs_path)
 
-        
         return  msg
 
     except FileNotFoundError:
@@ -216,6 +354,130 @@ def edit_file(path: str, old_string: str, new_string: str, number_of_replacement
         writer(msg)
         return  msg
 
+
+class FileEdit(BaseModel):
+    path: str
+    old_string: str
+    new_string: str
+    number_of_replacements: int = 1
+
+
+def _stage(abs_path: str, content: str) -> str:
+    """Write content to a temp file next to `abs_path` and return its path."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(abs_path), prefix=".swi-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.chmod(tmp_path, os.stat(abs_path).st_mode & 0o7777)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+
+@tool
+def edit_files(edits: list[FileEdit]) -> str:
+    """
+    Apply many string replacements across one or more files as a single change.
+
+    Edits are applied in order, so later edits of the same file see the result of
+    earlier ones. The whole batch is shown as one diff for approval and is
+    all-or-nothing: if any old_string is not found nothing is written.
+
+    Args:
+        edits (list[FileEdit]): Edits, each with path, old_string, new_string
+            (may be empty to delete) and number_of_replacements (default = 1)
+
+    Returns:
+            str: Status or combined diff of the change,
+    """
+    writer = get_stream_writer()
+    edits = [FileEdit.model_validate(edit) if isinstance(edit, dict) else edit for edit in edits]
+    if not edits:
+        return "No edits provided"
+
+    # Apply every edit in memory, one pass per file
+    originals: dict[str, str] = {}
+    updated: dict[str, str] = {}
+    for index, edit in enumerate(edits, start=1):
+        if not edit.old_string.strip():
+            return f"Edit {index}: Empty string cannot be replaced"
+        # 'a.py', './a.py' and a symlink to it are one file, edited in one pass
+        abs_path = os.path.realpath(_resolve(edit.path))
+        if abs_path not in updated:
+            try:
+                originals[abs_path] = updated[abs_path] = file_cache.read_text(abs_path)
+            except FileNotFoundError:
+                return f"Edit {index}: File not found: {edit.path}. No file was changed"
+            except Exception as e:
+                return f"Edit {index}: Unexpected error reading {edit.path}: {e}. No file was changed"
+        if edit.old_string not in updated[abs_path]:
+            msg = f"Edit {index}: No occurrences of '{edit.old_string}' found in {abs_path}. No file was changed"
+            writer(msg)
+            return msg
+        updated[abs_path] = updated[abs_path].replace(edit.old_string, edit.new_string, edit.number_of_replacements)
+
+    changed = [path for path in updated if updated[path] != originals[path]]
+    if not changed:
+        return "Edits leave every file unchanged"
+
+    diff = "".join(
+        "".join(
+            difflib.unified_diff(
+                originals[path].splitlines(keepends=True),
+                updated[path].splitlines(keepends=True),
+                fromfile=f"{path} (current)",
+                tofile=f"{path} (updated)"
+            )
+        )
+        for path in changed
+    )
+    msg = f"{len(edits)} edits in {len(changed)} file(s)\n\nDiff:\n{diff}"
+    writer(msg)
+
+    human_response = interrupt(f"Permission to Update {len(changed)} file(s)\n{diff}")
+    if not _approved(human_response):
+        return "User says not to edit the files"
+
+    # Stage every file first, then swap them in. Roll back on any failure.
+    staged: dict[str, str] = {}
+    replaced: list[str] = []
+    try:
+        for path in changed:
+            staged[path] = _stage(path, updated[path])
+        for path in changed:
+            os.replace(staged[path], path)
+            del staged[path]
+            replaced.append(path)
+    except Exception as e:
+        not_restored = []
+        for path in replaced:
+            try:
+                staged[path] = _stage(path, originals[path])
+                os.replace(staged[path], path)
+                del staged[path]
+            except OSError:
+                not_restored.append(path)
+        for tmp_path in staged.values():
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+        if not_restored:
+            msg = (
+                f"Error writing edits: {e}. These files were edited and could not be restored, "
+                f"check them before retrying: {', '.join(not_restored)}"
+            )
+        else:
+            msg = f"Error writing edits, no file was changed: {e}"
+        writer(msg)
+        return msg
+    finally:
+        for path in changed:
+            file_cache.invalidate(path)
+
+    return msg
+
     
 @tool()
 def get_folder_structure():
@@ -236,11 +498,6 @@ def get_folder_structure():
     
 
 
-@tool
-def note_pad(str):
-    """Can be used as a NotePad to store information for long term"""
-    open(NOTEPAD,"a").write(str)
-    return "Task completed"
 
 
 
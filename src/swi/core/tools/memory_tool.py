@@ -0,0 +1,70 @@
+import os
+import asyncio
+from langchain_core.tools import tool
+from langgraph.config import get_stream_writer
+from swi.utils.config import MEMORY_RECALL_K, MEMORY_RECALL_MAX_CHARS
+from swi.utils.memory import get_memory_store
+
+
+
+from enum import Enum
+class MEMORY(Enum):
+    NOTE = "note_pad"
+    RECALL = "recall"
+
+
+@tool
+async def note_pad(note: str, key: str = None, tags: list[str] = None) -> str:
+    """
+    Remember a short fact for future sessions (user preferences, project conventions, useful paths or commands).
+
+    Args:
+        note (str): The fact, one or two sentences
+        key (str): Stable name for the fact, e.g. 'test-command'. Storing under an existing key replaces it (optional)
+        tags (list[str]): Labels to filter on when recalling, e.g. ['preference'] (optional)
+
+    Returns:
+            str: Whether the note was stored, updated or already known
+    """
+    writer = get_stream_writer()
+    writer(f"Remembering: {note[:80]}")
+    try:
+        note_id, status = await asyncio.to_thread(get_memory_store(os.getcwd()).add, note, key, tags)
+    except ValueError as e:
+        return f"Error: {e}"
+    return f"Note {note_id} {status}"
+
+
+def _recall(query: str, k: int, tag: str) -> str:
+    notes = get_memory_store(os.getcwd()).search(query, k, tag)
+    if not notes:
+        return "No matching notes"
+    lines, size = [], 0
+    for note in notes:
+        label = f"[{note.key}] " if note.key else ""
+        tags = f" ({', '.join(note.tags)})" if note.tags else ""
+        line = f"- {label}{note.text}{tags}"
+        if size + len(line) > MEMORY_RECALL_MAX_CHARS:
+            lines.append("… more notes matched, refine the query")
+            break
+        lines.append(line)
+        size += len(line)
+    return "\n".join(lines)
+
+
+@tool
+async def recall(query: str = "", k: int = MEMORY_RECALL_K, tag: str = None) -> str:
+    """
+    Look up remembered notes relevant to a query. Only the best matches are returned.
+
+    Args:
+        query (str): Words to search for; empty returns the most recently used notes
+        k (int): Maximum number of notes
+        tag (str): Only notes with this tag (optional)
+
+    Returns:
+            str: One note per line, '- [key] text (tags)'
+    """
+    writer = get_stream_writer()
+    writer(f"Recalling: {query or tag or 'recent notes'}")
+    return await asyncio.to_thread(_recall, query, max(1, min(k, 20)), tag)
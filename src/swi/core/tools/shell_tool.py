@@ -1,48 +1,169 @@
+import os
+import time
+import codecs
+import signal
 import logging
 import asyncio
 from langchain_core.tools import tool
 from langgraph.config import get_stream_writer
+from swi.utils.config import (
+    CACHE_DIR,
+    SHELL_LOG_DIR,
+    SHELL_LOG_MAX_FILES,
+    SHELL_LOG_MAX_BYTES,
+    SHELL_TIMEOUT,
+    SHELL_HEAD_BYTES,
+    SHELL_TAIL_BYTES,
+)
 
 
 
 from enum import Enum
 class SHELL(Enum):
     SHELL = "shell_tool"
-    
+
+
+class BoundedOutput:
+    """Keeps the head and the tail of a stream of text, counting what is dropped."""
+
+    def __init__(self, head: int = SHELL_HEAD_BYTES, tail: int = SHELL_TAIL_BYTES):
+        self.head_limit = head
+        self.tail_limit = tail
+        self.head = []
+        self.head_size = 0
+        self.tail = ""
+        self.total = 0
+
+    def write(self, text: str):
+        self.total += len(text)
+        if self.head_size < self.head_limit:
+            part = text[:self.head_limit - self.head_size]
+            self.head.append(part)
+            self.head_size += len(part)
+            text = text[len(part):]
+        if text:
+            self.tail = (self.tail + text)[-self.tail_limit:]
+
+    @property
+    def truncated(self) -> bool:
+        return self.total > self.head_size + len(self.tail)
+
+    def render(self, log_path: str = None) -> str:
+        head = "".join(self.head)
+        if not self.truncated:
+            return head + self.tail
+        omitted = self.total - self.head_size - len(self.tail)
+        where = f", full log: {log_path}" if log_path else ""
+        return f"{head}\n… [{omitted:,} characters omitted{where}]\n{self.tail}"
+
+
+def _kill(process):
+    """Kill the whole process group so children (npm, pytest workers...) die too."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+def _prune_logs(log_dir: str, keep: str, max_files: int = SHELL_LOG_MAX_FILES, max_bytes: int = SHELL_LOG_MAX_BYTES):
+    """Delete the oldest command logs until at most `max_files` logs and `max_bytes` remain."""
+    logs = []
+    with os.scandir(log_dir) as it:
+        for entry in it:
+            if not entry.name.endswith(".log"):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            logs.append((st.st_mtime, st.st_size, entry.path))
+    count = len(logs)
+    total = sum(size for _, size, _ in logs)
+    for _, size, path in sorted(logs):
+        if count <= max_files and total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        count -= 1
+        total -= size
+
 
 @tool
-async def shell_tool(command: str) -> str:
+async def shell_tool(command: str, timeout: int = SHELL_TIMEOUT) -> str:
     """
     Run a shell command asynchronously and collect its output in real time.
-    Returns: full_output (str)
-    
+
+    Args:
+        command (str): Command to run
+        timeout (int): Seconds before the command is killed
+
+    Returns: full_output (str), the head and tail of it for long outputs
     """
     process = await asyncio.create_subprocess_shell(
         command,
         stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
     )
     writer = get_stream_writer()
-    output_lines = []
-
-    
-    writer("Executing Command :{command}")
-    # Read stdout line by line
-    while True:
-        line = await process.stdout.readline()
-        if not line:
-            break
-        decoded = line.decode().rstrip()
-        output_lines.append(decoded)
-        writer(decoded) 
-        
+    output = BoundedOutput()
+    sizes = {"stdout": 0, "stderr": 0}
+
+    log_dir = os.path.join(CACHE_DIR, SHELL_LOG_DIR)
+    os.makedirs(log_dir, exist_ok=True)
+    log_path = os.path.join(log_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{process.pid}.log")
+    log = open(log_path, "w", encoding="utf-8")
+
+    writer(f"Executing Command :{command}")
+
+    async def drain(stream, name):
+        # Read both pipes at the same time, a full stderr pipe would block the process
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while chunk := await stream.read(65536):
+            sizes[name] += len(chunk)
+            text = decoder.decode(chunk)
+            log.write(text)
+            output.write(text)
+            writer(text.rstrip())
 
-    # Wait for process to finish
-    await process.wait()
+    timed_out = False
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(drain(process.stdout, "stdout"), drain(process.stderr, "stderr"), process.wait()),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        timed_out = True
+        _kill(process)
+        await process.wait()
+    except asyncio.CancelledError:
+        _kill(process)
+        raise
+    finally:
+        log.close()
 
-    # Capture stderr too (optional)
-    stderr = await process.stderr.read()
-    if stderr:
-        output_lines.append(stderr.decode())
+    # Only keep the log when the model gets a truncated view of it
+    if not output.truncated:
+        os.remove(log_path)
+        log_path = None
+    else:
+        _prune_logs(log_dir, keep=log_path)
 
-    return "\n".join(output_lines)
+    result = output.render(log_path)
+    notes = []
+    if timed_out:
+        notes.append(f"killed after {timeout}s timeout")
+    elif process.returncode:
+        notes.append(f"exit code {process.returncode}")
+    if output.truncated or timed_out:
+        notes.append(f"stdout {sizes['stdout']:,} bytes, stderr {sizes['stderr']:,} bytes")
+    if notes:
+        result += f"\n[{'; '.join(notes)}]"
+    return result
@@ -1,16 +1,19 @@
 # backend/react_agent.py
 
+# Heavy modules (langgraph, langchain providers, pyfiglet, jinja2) are imported
+# inside the functions that need them, so `swi` starts close to interpreter speed.
+from swi.utils.startup import timed, timed_import, report
+
+import os
+import uuid
 import asyncio
+import argparse
 from typing import Optional
 
-import pyfiglet
 from pydantic import BaseModel
 from rich.console import Console
 
-from langchain_core.messages import HumanMessage
-from swi.core.builder import CodingAgent
 from dotenv import load_dotenv
-from swi.core.prompt import get_prompt
 # Initialize Rich console for colored outputs
 console = Console()
 
@@ -24,70 +27,120 @@ load_dotenv(ENV_FILE)
 # -------------------------------
 class Query(BaseModel):
     message: str
-    thread_id: Optional[str]
+    thread_id: Optional[str] = None
 
 
 # -------------------------------
 # Helper functions
 # -------------------------------
-def get_thread() -> str:
+def get_thread(resume: Optional[str] = None) -> str:
     """
     Return a thread ID for conversation.
-    Currently static, can be extended to dynamic/thread management.
+    A new session gets a fresh ID, `resume` continues a stored one.
     """
-    return "1"
+    return resume or uuid.uuid4().hex
 
 
 # -------------------------------
 # Main async agent loop
 # -------------------------------
-async def run_graph():
+async def run_graph(thread_id: str, loader=None, startup_report: bool = False):
     """
     Main entry point to start the CodingAgent in interactive mode.
     Loads MCP tools, builds the agent, and interacts with user input.
     """    
+    builder = timed_import("swi.core.builder")
+    prompt = timed_import("swi.core.prompt")
+    HumanMessage = timed_import("langchain_core.messages").HumanMessage
+    StreamRenderer = timed_import("swi.utils.renderer").StreamRenderer
+
     # Build the agent graph
-    graph = await CodingAgent().builder()
+    with timed("build graph"):
+        graph = await builder.CodingAgent(loader).builder()
 
     # Display ASCII banner
+    pyfiglet = timed_import("pyfiglet")
     ascii_art = pyfiglet.figlet_format("SWE", font="block")
     console.print(f"[bold cyan]{ascii_art}[/bold cyan]")
     console.print("[bold green]Agent Ready![/bold green]")
+    console.print(f"[dim]Session {thread_id} (resume with: swi --resume {thread_id})[/dim]")
+    if startup_report:
+        report(console)
 
     # Interactive input loop
-    config = {"configurable": {"thread_id": "1"}} 
+    config = {"configurable": {"thread_id": thread_id}}
+    renderer = StreamRenderer(console)
     while True:
         text_input = input("> ").strip()
 
         if text_input.lower() == "exit":
             console.print("[red]Exiting agent...[/red]")
             break
+        if text_input.startswith("/expand"):
+            # Full text of a collapsed tool output, in the pager
+            block_id = text_input.removeprefix("/expand").strip()
+            if not block_id.isdigit() or not renderer.expand(int(block_id)):
+                console.print(f"[red]No collapsed output {block_id}[/red]")
+            continue
         
         
-        # Pass user input to agent 
-        async for type, content in graph.astream(
-            input={"messages": HumanMessage(text_input), "context": get_prompt()},
-            config=config,
-            stream_mode=["messages","custom"],
-            kwargs = {"recursionLimit": 200}
-            
-        ):
-            
-            if type == "messages":
-                content, metadata = content
-                console.print(content.content, style="cyan", end="")
-            else:
-                console.print(content, style="magenta")
+        # Pass user input to agent, the renderer buffers chunks and redraws at a capped rate
+        with renderer:
+            async for type, content in graph.astream(
+                input={"messages": HumanMessage(text_input), "context": prompt.get_context()},
+                config=config,
+                stream_mode=["messages","custom"],
+                kwargs = {"recursionLimit": 200}
+                
+            ):
+                renderer.feed(type, content)
 
 
 # -------------------------------
 # Entry point
 # -------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(prog="swi", description="Coding Agent")
+    parser.add_argument("--resume", metavar="THREAD_ID", help="continue a previous session")
+    parser.add_argument("--startup-report", action="store_true", help="print an import/startup time breakdown")
+    parser.add_argument("--profile", action="store_true", help="trace nodes, model calls and tools to .swi/traces")
+    parser.add_argument(
+        "--route", nargs="?", const="all", metavar="PROVIDERS",
+        help="route model calls to the fastest provider: 'all' providers with keys (default) or e.g. 'openai,groq'",
+    )
+    parser.add_argument("--no-hedge", action="store_true", help="with --route, never send backup requests")
+    parser.add_argument(
+        "--llm-cache", choices=["off", "auto", "record", "replay"],
+        help="cache model responses in .swi/llm_cache.sqlite (replay fails on requests never recorded)",
+    )
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    thread_id = get_thread(args.resume)
+    if args.profile:
+        from swi.utils.tracing import tracer
+        tracer.enable(thread_id)
+    if args.route:
+        os.environ["ROUTE"] = args.route
+    if args.no_hedge:
+        os.environ["ROUTE_HEDGE"] = "0"
+    if args.llm_cache:
+        os.environ["LLM_CACHE"] = args.llm_cache
+    loader = None
     # Run the asnc event loop
     try:
         from swi.utils.model import ModelLoader
-        ModelLoader().check()
+        loader = ModelLoader()
+        # Replayed sessions never reach the provider
+        if os.getenv("LLM_CACHE") != "replay":
+            with timed("check provider"):
+                loader.check()
     except Exception as e:  # noqa: F841
         console.print_exception() 
-    asyncio.run(run_graph())
+    try:
+        asyncio.run(run_graph(thread_id, loader, args.startup_report))
+    finally:
+        if args.profile:
+            tracer.report(console)
@@ -0,0 +1,245 @@
+# Multi-session HTTP/SSE server for the CodingAgent
+
+import os
+import hmac
+import json
+import time
+import asyncio
+import secrets
+import argparse
+from urllib.parse import urlsplit
+from typing import Any, Optional
+
+from pydantic import BaseModel, ValidationError
+from rich.console import Console
+
+from langchain_core.messages import HumanMessage
+from langgraph.types import Command
+from swi.core.builder import CodingAgent
+from swi.core.prompt import get_context
+from swi.main import Query, get_thread
+from swi.utils.config import SERVER_HOST, SERVER_PORT, SERVER_MAX_ACTIVE
+
+console = Console()
+
+
+class Resume(BaseModel):
+    thread_id: str
+    value: Any
+
+
+class ServerStats:
+    """Throughput counters exposed on GET /stats."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.cpu_started = time.process_time()
+        self.sessions: set[str] = set()
+        self.active = 0
+        self.requests = 0
+        self.completed = 0
+        self.failed = 0
+
+    def snapshot(self) -> dict:
+        elapsed = time.monotonic() - self.started
+        cpu = time.process_time() - self.cpu_started
+        cores = os.cpu_count() or 1
+        return {
+            "sessions": len(self.sessions),
+            "active": self.active,
+            "requests": self.requests,
+            "completed": self.completed,
+            "failed": self.failed,
+            "uptime_seconds": round(elapsed, 3),
+            "cpu_seconds": round(cpu, 3),
+            "cores": cores,
+            "sessions_per_core": round(len(self.sessions) / cores, 3),
+            "turns_per_core_second": round(self.completed / (elapsed * cores), 3) if elapsed else 0.0,
+            "turns_per_cpu_second": round(self.completed / cpu, 3) if cpu else 0.0,
+        }
+
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+def _hostname(value: str) -> str:
+    """Host part of a Host header or Origin URL, without port or brackets."""
+    if "://" not in value:
+        value = f"http://{value}"
+    try:
+        return (urlsplit(value).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+def response(status: str, payload: bytes = b"", content_type: str = "application/json") -> bytes:
+    return (
+        f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+        f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n"
+    ).encode() + payload
+
+
+def sse(event: str, data) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode()
+
+
+class AgentServer:
+    """
+    Serves one compiled graph to many sessions over HTTP.
+
+    POST /query  {"message": ..., "thread_id": ...}  -> text/event-stream
+    POST /resume {"thread_id": ..., "value": ...}    -> text/event-stream
+    GET  /stats                                       -> JSON counters
+
+    Each thread_id runs one turn at a time, and at most `max_active` turns run
+    across all sessions.
+
+    The graph runs shell commands and writes files, so every request must
+    carry `Authorization: Bearer <token>` (a fresh token per launch unless
+    SWI_SERVER_TOKEN is set), a local Host and, if sent, a local Origin, and
+    POST bodies must be `application/json`. This keeps web pages open in the
+    user's browser from driving the agent.
+    """
+
+    def __init__(self, graph, max_active: int = SERVER_MAX_ACTIVE, token: str = None, host: str = SERVER_HOST):
+        self.graph = graph
+        self.token = token or os.getenv("SWI_SERVER_TOKEN") or secrets.token_urlsafe(32)
+        self.allowed_hosts = LOCAL_HOSTS | {host.lower()}
+        self.stats = ServerStats()
+        self.slots = asyncio.Semaphore(max_active)
+        # thread_id -> [lock, requests holding or waiting for it], dropped when the count is back to 0
+        self.session_locks: dict[str, list] = {}
+
+    async def stream_turn(self, graph_input, thread_id: str, writer: asyncio.StreamWriter):
+        entry = self.session_locks.setdefault(thread_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            await self.run_turn(graph_input, thread_id, entry[0], writer)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self.session_locks[thread_id]
+
+    async def run_turn(self, graph_input, thread_id: str, lock: asyncio.Lock, writer: asyncio.StreamWriter):
+        config = {"configurable": {"thread_id": thread_id}, "recursion_limit": 200}
+        self.stats.sessions.add(thread_id)
+        self.stats.requests += 1
+
+        writer.write(sse("session", {"thread_id": thread_id}))
+        async with lock, self.slots:
+            self.stats.active += 1
+            try:
+                async for mode, content in self.graph.astream(
+                    input=graph_input,
+                    config=config,
+                    stream_mode=["messages", "custom", "updates"],
+                ):
+                    if mode == "messages":
+                        chunk, metadata = content
+                        # Only the agent's answer, not compression summaries
+                        if metadata.get("langgraph_node") == "call_model" and chunk.content:
+                            writer.write(sse("message", chunk.content))
+                    elif mode == "custom":
+                        writer.write(sse("custom", content))
+                    elif "__interrupt__" in content:
+                        writer.write(sse("interrupt", [i.value for i in content["__interrupt__"]]))
+                    await writer.drain()
+                writer.write(sse("done", {"thread_id": thread_id}))
+                self.stats.completed += 1
+            except (ConnectionError, asyncio.CancelledError):
+                self.stats.failed += 1
+                raise
+            except Exception as e:
+                self.stats.failed += 1
+                writer.write(sse("error", str(e)))
+            finally:
+                self.stats.active -= 1
+
+    def check_request(self, method: str, headers: dict) -> bytes:
+        """The error response for a request that must not be served, or None."""
+        if _hostname(headers.get("host", "")) not in self.allowed_hosts:
+            return response("403 Forbidden", b'{"error": "host not allowed"}')
+        if "origin" in headers and _hostname(headers["origin"]) not in self.allowed_hosts:
+            return response("403 Forbidden", b'{"error": "origin not allowed"}')
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), self.token.encode()):
+            return response("401 Unauthorized", b'{"error": "missing or invalid bearer token"}')
+        if method == "POST" and headers.get("content-type", "").split(";")[0].strip().lower() != "application/json":
+            return response("415 Unsupported Media Type", b'{"error": "expected application/json"}')
+        return None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode().strip()
+            if not request_line:
+                return
+            method, path, _ = request_line.split(" ", 2)
+            headers = {}
+            while (line := (await reader.readline()).decode().strip()):
+                key, _, value = line.partition(":")
+                headers[key.lower()] = value.strip()
+
+            # Checked before the body is read, nothing unauthenticated reaches the graph
+            if rejection := self.check_request(method, headers):
+                writer.write(rejection)
+                return
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            if method == "GET" and path == "/stats":
+                writer.write(response("200 OK", json.dumps(self.stats.snapshot()).encode()))
+                return
+
+            if method != "POST" or path not in ("/query", "/resume"):
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                return
+
+            try:
+                if path == "/query":
+                    query = Query.model_validate_json(body)
+                    thread_id = get_thread(query.thread_id)
+                    graph_input = {"messages": HumanMessage(query.message), "context": get_context()}
+                else:
+                    resume = Resume.model_validate_json(body)
+                    thread_id = resume.thread_id
+                    graph_input = Command(resume=resume.value)
+            except ValidationError as e:
+                writer.write(response("422 Unprocessable Entity", e.json().encode()))
+                return
+
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+            )
+            await self.stream_turn(graph_input, thread_id, writer)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            try:
+                await writer.drain()
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def serve(host: str = SERVER_HOST, port: int = SERVER_PORT, max_active: int = SERVER_MAX_ACTIVE, graph=None):
+    """Compile the graph once and serve it until cancelled."""
+    graph = graph or await CodingAgent().builder()
+    app = AgentServer(graph, max_active=max_active, host=host)
+    server = await asyncio.start_server(app.handle, host, port)
+    console.print(f"[bold green]Agent server listening on http://{host}:{port}[/bold green]")
+    console.print(f"Send [bold]Authorization: Bearer {app.token}[/bold] with every request")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(prog="swi-server", description="Coding Agent server")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--max-active", type=int, default=SERVER_MAX_ACTIVE, help="graph runs in flight across all sessions")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_active))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,141 @@
+import os
+import re
+import hashlib
+import tempfile
+import threading
+
+from swi.utils.config import (
+    CACHE_DIR,
+    ARTIFACT_DIR,
+    ARTIFACT_MAX_BYTES,
+    ARTIFACT_PREVIEW_HEAD_LINES,
+    ARTIFACT_PREVIEW_TAIL_LINES,
+    ARTIFACT_PREVIEW_LINE_CHARS,
+)
+
+HANDLE = re.compile(r"^art_[0-9a-f]{16}$")
+
+
+class ArtifactStore:
+    """
+    Content addressed store of large tool outputs in `.swi/artifacts`.
+
+    The handle is derived from the sha256 of the text, so storing the same
+    output twice (the same file read in two turns) keeps one copy. Reading
+    an artifact refreshes its mtime; past ARTIFACT_MAX_BYTES the least
+    recently used artifacts are deleted. The store size is kept as a running
+    total, the folder is only walked past the budget (and once at the first put).
+    """
+
+    def __init__(self, root: str = "./", path: str = None, max_bytes: int = ARTIFACT_MAX_BYTES):
+        self.root = os.path.abspath(root)
+        self.path = path or os.path.join(self.root, CACHE_DIR, ARTIFACT_DIR)
+        os.makedirs(self.path, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total: int = None
+
+    def _file(self, handle: str) -> str:
+        if not HANDLE.match(handle or ""):
+            raise ValueError(f"Invalid artifact handle {handle!r}, expected 'art_' and 16 hex digits")
+        return os.path.join(self.path, handle[4:6], f"{handle}.txt")
+
+    def put(self, text: str) -> str:
+        data = text.encode("utf-8", "replace")
+        handle = "art_" + hashlib.sha256(data).hexdigest()[:16]
+        path = self._file(handle)
+        if os.path.exists(path):
+            os.utime(path)
+            return handle
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written under a temporary name, a reader never sees half an artifact
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self.lock:
+            if self.total is None:
+                self.total = sum(size for _, size, _ in self._files())
+            else:
+                self.total += len(data)
+            if self.total > self.max_bytes:
+                self._evict(keep=path)
+        return handle
+
+    def read(self, handle: str) -> str:
+        path = self._file(handle)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Artifact {handle} no longer exists, run the tool again") from None
+        os.utime(path)
+        return data.decode("utf-8", "replace")
+
+    def _files(self) -> list[tuple[float, int, str]]:
+        files = []
+        for folder, _, names in os.walk(self.path):
+            for name in names:
+                path = os.path.join(folder, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+        return files
+
+    def _evict(self, keep: str):
+        """Delete least recently used artifacts until the store fits. Called with the lock held."""
+        files = self._files()
+        # The walk also corrects the running total for other processes sharing the folder
+        self.total = sum(size for _, size, _ in files)
+        # Down to 90% of the budget, so the next puts do not walk again at once
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in sorted(files):
+            if self.total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                self.total -= size
+            except OSError:
+                pass
+
+
+def preview(text: str, head: int = ARTIFACT_PREVIEW_HEAD_LINES, tail: int = ARTIFACT_PREVIEW_TAIL_LINES) -> tuple[str, int]:
+    """First and last lines of `text` (long lines cut), and the total number of lines."""
+    lines = text.splitlines()
+    cut = [line if len(line) <= ARTIFACT_PREVIEW_LINE_CHARS else line[:ARTIFACT_PREVIEW_LINE_CHARS] + " …" for line in lines]
+    if len(lines) <= head + tail:
+        return "\n".join(cut), len(lines)
+    omitted = len(lines) - head - tail
+    return "\n".join(cut[:head] + [f"… {omitted:,} lines omitted …"] + cut[-tail:]), len(lines)
+
+
+def slice_text(text: str, start_line: int = None, end_line: int = None, offset: int = None, length: int = None) -> tuple[str, str]:
+    """
+    A line range (1-based, inclusive) or a byte range of `text`.
+
+    Returns (slice, description of the range).
+    """
+    if start_line is not None or end_line is not None:
+        lines = text.splitlines(keepends=True)
+        start = max(1, start_line or 1)
+        end = min(len(lines), end_line or len(lines))
+        return "".join(lines[start - 1:end]), f"lines {start}-{end} of {len(lines):,}"
+    data = text.encode("utf-8", "replace")
+    start = max(0, offset or 0)
+    end = len(data) if length is None else min(len(data), start + max(0, length))
+    return data[start:end].decode("utf-8", "replace"), f"bytes {start:,}-{end:,} of {len(data):,}"
+
+
+_stores: dict[str, ArtifactStore] = {}
+
+
+def get_artifact_store(root: str = "./") -> ArtifactStore:
+    """Return the process wide ArtifactStore for a root folder."""
+    abs_root = os.path.abspath(root)
+    if abs_root not in _stores:
+        _stores[abs_root] = ArtifactStore(abs_root)
+    return _stores[abs_root]
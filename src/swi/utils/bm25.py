@@ -0,0 +1,226 @@
+import os
+import re
+import math
+import time
+import sqlite3
+import threading
+from collections import Counter
+
+from swi.utils.config import (
+    CACHE_DIR,
+    RETRIEVE_INDEX_DB,
+    RETRIEVE_REFRESH_INTERVAL,
+    RETRIEVE_MAX_FILE_BYTES,
+    RETRIEVE_PATH_WEIGHT,
+)
+from swi.utils.helper import iter_project_files, read_text_file
+
+SCHEMA = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS terms_file ON terms (file_id);
+"""
+
+K1 = 1.2
+B = 0.75
+
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|[0-9]+")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+STOPWORDS = {
+    "the", "and", "for", "with", "this", "that", "from", "import", "return", "def", "self",
+    "none", "true", "false", "not", "are", "was", "were", "you", "can", "could", "please",
+    "what", "how", "why", "where", "which", "when", "does", "into", "some", "all", "any",
+    "let", "var", "const", "function", "class", "public", "private", "static", "void", "int",
+    "in", "is", "of", "to", "it", "on", "or", "if", "as", "be", "do", "an", "by", "at", "we", "me", "my",
+}
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercase terms of code or prose.
+
+    Identifiers are kept whole and also split on '_' and camelCase, so
+    `getStreamWriter` matches a query for "stream writer".
+    """
+    terms = []
+    for word in _WORD.findall(text):
+        lower = word.lower()
+        parts = [part.lower() for chunk in word.split("_") for part in _CAMEL.findall(chunk)]
+        if len(lower) > 1 and lower not in STOPWORDS:
+            terms.append(lower)
+        if len(parts) > 1:
+            terms.extend(part for part in parts if len(part) > 1 and part not in STOPWORDS)
+    return terms
+
+
+class BM25Index:
+    """
+    On-disk BM25 index of the project files.
+
+    Documents are files. Terms come from the content plus the path, which is
+    weighted RETRIEVE_PATH_WEIGHT times so `auth/session.py` ranks for "session".
+    Like the trigram index, `refresh` re-tokenises only files whose (mtime,
+    size) changed and is throttled by RETRIEVE_REFRESH_INTERVAL, and
+    `start_refresh` runs refreshes on a background thread. `ready` is
+    false until an index exists; retrieval is skipped until then.
+    """
+
+    def __init__(self, root: str = "./", path: str = None):
+        self.root = os.path.abspath(root)
+        self.path = path or os.path.join(self.root, CACHE_DIR, RETRIEVE_INDEX_DB)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        # Refreshes write through their own connection, searches keep reading the last commit
+        self.writer: sqlite3.Connection = None
+        self.write_lock = threading.Lock()
+        self.thread: threading.Thread = None
+        self.ready = self.conn.execute("SELECT 1 FROM files LIMIT 1").fetchone() is not None
+        self._last_refresh = 0.0
+
+    # -------------------------------
+    # Indexing
+    # -------------------------------
+    def _terms(self, rel_path: str, data: bytes) -> Counter:
+        counts = Counter(tokenize(data.decode("utf-8", "replace")))
+        for term in tokenize(rel_path.replace("/", " ").replace(".", " ")):
+            counts[term] += RETRIEVE_PATH_WEIGHT
+        return counts
+
+    def start_refresh(self, force: bool = True):
+        """Refresh on a background thread, unless one is already running (or, without `force`, one ran recently)."""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        if not force and time.monotonic() - self._last_refresh < RETRIEVE_REFRESH_INTERVAL:
+            return
+        self.thread = threading.Thread(target=self.refresh, kwargs={"force": True}, name="bm25-index", daemon=True)
+        self.thread.start()
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Bring the index up to date. Returns the number of files (re)indexed or removed.
+
+        Returns 0 at once while another refresh (e.g. the background build) runs.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_refresh < RETRIEVE_REFRESH_INTERVAL:
+            return 0
+        if not self.write_lock.acquire(blocking=False):
+            return 0
+        try:
+            if self.writer is None:
+                self.writer = sqlite3.connect(self.path, check_same_thread=False)
+            changed = self._refresh(self.writer)
+        finally:
+            self.write_lock.release()
+        self.ready = True
+        self._last_refresh = time.monotonic()
+        return changed
+
+    def _refresh(self, conn: sqlite3.Connection) -> int:
+        known = {
+            path: (file_id, mtime_ns, size)
+            for file_id, path, mtime_ns, size in conn.execute("SELECT id, path, mtime_ns, size FROM files")
+        }
+        changed = 0
+        with conn:
+            for rel_path, st in iter_project_files(self.root, max_bytes=RETRIEVE_MAX_FILE_BYTES):
+                previous = known.pop(rel_path, None)
+                if previous is not None and previous[1:] == (st.st_mtime_ns, st.st_size):
+                    continue
+                if previous is not None:
+                    conn.execute("DELETE FROM terms WHERE file_id = ?", (previous[0],))
+                data = read_text_file(os.path.join(self.root, rel_path))
+                counts = self._terms(rel_path, data) if data else Counter()
+                cur = conn.execute(
+                    "INSERT INTO files (path, mtime_ns, size, length) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET mtime_ns = excluded.mtime_ns, "
+                    "size = excluded.size, length = excluded.length RETURNING id",
+                    (rel_path, st.st_mtime_ns, st.st_size, sum(counts.values())),
+                )
+                file_id = cur.fetchone()[0]
+                conn.executemany(
+                    "INSERT INTO terms (term, file_id, tf) VALUES (?, ?, ?)",
+                    ((term, file_id, tf) for term, tf in sorted(counts.items())),
+                )
+                changed += 1
+            for file_id, _, _ in known.values():
+                conn.execute("DELETE FROM terms WHERE file_id = ?", (file_id,))
+                conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            changed += len(known)
+        return changed
+
+    # -------------------------------
+    # Ranking
+    # -------------------------------
+    def search(self, query: str, k: int = 5) -> list[tuple[str, float, list[str]]]:
+        """Top `k` files for the query as (relative path, score, matched terms)."""
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+        with self.lock:
+            count, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM files").fetchone()
+            if not count:
+                return []
+            avg_length = total / count or 1
+            scores: dict[int, float] = {}
+            matched: dict[int, list[str]] = {}
+            for term in terms:
+                postings = self.conn.execute(
+                    "SELECT t.file_id, t.tf, f.length FROM terms t JOIN files f ON f.id = t.file_id WHERE t.term = ?",
+                    (term,),
+                ).fetchall()
+                if not postings:
+                    continue
+                # Terms found in most files (e.g. "name", "value") carry almost no weight
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for file_id, tf, length in postings:
+                    norm = tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_length))
+                    scores[file_id] = scores.get(file_id, 0.0) + idf * norm
+                    matched.setdefault(file_id, []).append(term)
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            paths = dict(self.conn.execute(
+                f"SELECT id, path FROM files WHERE id IN ({','.join('?' * len(best))})", [file_id for file_id, _ in best]
+            ).fetchall()) if best else {}
+        return [(paths[file_id], score, matched[file_id]) for file_id, score in best if file_id in paths]
+
+
+def best_window(text: str, terms: list[str], lines: int) -> tuple[int, str]:
+    """The `lines` long window of `text` with the most query terms, as (first line, snippet)."""
+    all_lines = text.splitlines()
+    if len(all_lines) <= lines:
+        return 1, text
+    wanted = set(terms)
+    hits = [sum(1 for term in tokenize(line) if term in wanted) for line in all_lines]
+    window = sum(hits[:lines])
+    best, best_start = window, 0
+    for start in range(1, len(all_lines) - lines + 1):
+        window += hits[start + lines - 1] - hits[start - 1]
+        if window > best:
+            best, best_start = window, start
+    return best_start + 1, "\n".join(all_lines[best_start:best_start + lines])
+
+
+_indexes: dict[str, BM25Index] = {}
+
+
+def get_bm25_index(root: str = "./") -> BM25Index:
+    """Return the process wide BM25Index for a root folder."""
+    abs_root = os.path.abspath(root)
+    if abs_root not in _indexes:
+        _indexes[abs_root] = BM25Index(abs_root)
+    return _indexes[abs_root]
@@ -1,3 +1,144 @@
 ENV_FILE = ".env"
 
-NOTEPAD = ".NOTEPAD"
\ No newline at end of file
+NOTEPAD = ".NOTEPAD"  # legacy append-only notes, imported into the memory store
+
+# Local cache folder (tree index, etc.) created inside the project root
+CACHE_DIR = ".swi"
+
+IGNORE_DIRS = {"node_modules", ".git", ".build", "__pycache__", ".venv", ".idea", CACHE_DIR}
+
+# Project tree snapshot used in the system prompt
+TREE_INDEX_FILE = "tree_index.json"
+TREE_REFRESH_INTERVAL = 2.0  # seconds between change checks
+TREE_MAX_DEPTH = 6
+TREE_MAX_ENTRIES = 400
+TREE_MAX_BYTES = 16_000  # the rendered tree is cut once it reaches this size
+TREE_SUMMARIZE_OVER = 200  # folders with more direct entries are collapsed
+TREE_COUNT_LIMIT = 100_000  # stop counting files inside ignored folders past this
+
+# Context compression (CodingAgent.compress_context)
+COMPRESS_TOKEN_BUDGET = 24_000  # compress once the conversation is larger than this
+
+# Tool execution (swi.core.tool_executor.ToolExecutor)
+TOOL_CONCURRENCY = 8  # tool calls running at the same time, across all classes
+TOOL_CLASS_LIMITS = {
+    "io": 8,
+    "subprocess": 2,
+    # Mutating tools ask for approval, keep the prompts one at a time
+    "mutating": 1,
+}
+
+# URL fetching (swi.core.tools.fetch_tool)
+FETCH_CONCURRENCY = 8
+FETCH_TIMEOUT = 10  # seconds
+FETCH_MAX_BYTES = 512 * 1024  # stop reading a response body past this
+FETCH_MAX_CHARS = 1000  # text returned per URL
+HTTP_CACHE_DIR = "http_cache"  # inside CACHE_DIR
+
+# File reads (swi.core.tools.file_tool.get_file_content)
+READ_MAX_BYTES = 100_000  # byte budget per call, shared by all files of a glob
+READ_MAX_FILES = 100  # files read per glob
+READ_MMAP_THRESHOLD = 1024 * 1024  # files larger than this are memory-mapped
+FILE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # LRU budget of the shared file read cache
+
+# Shell commands (swi.core.tools.shell_tool)
+SHELL_TIMEOUT = 300  # seconds before the process group is killed
+SHELL_HEAD_BYTES = 4_000  # output kept from the start of a command
+SHELL_TAIL_BYTES = 8_000  # output kept from the end of a command
+SHELL_LOG_DIR = "logs"  # inside CACHE_DIR, full output of truncated commands
+SHELL_LOG_MAX_FILES = 50  # oldest logs are deleted past this many ...
+SHELL_LOG_MAX_BYTES = 256 * 1024 * 1024  # ... or this total size
+
+# Checkpointing (swi.core.checkpoint)
+CHECKPOINTER = "sqlite"  # "sqlite" or "memory"
+CHECKPOINT_DB = "checkpoints.sqlite"  # inside CACHE_DIR
+CHECKPOINT_RETENTION = 20  # checkpoints kept per thread, older ones are compacted away
+
+# Multi-session server (swi.server)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_MAX_ACTIVE = 32  # graph runs in flight across all sessions
+
+# Provider key validation cache (swi.utils.model.ModelLoader.check)
+VALIDATION_CACHE = "validated.json"  # inside CACHE_DIR
+VALIDATION_TTL = 24 * 60 * 60  # seconds a successful key check is trusted
+
+# Tracing (swi.utils.tracing, enabled with `swi --profile`)
+TRACE_DIR = "traces"  # inside CACHE_DIR, one JSONL and one OTLP/JSON file per session
+
+# Code search (swi.utils.trigram_index, search_code tool)
+SEARCH_INDEX_DB = "trigram_v2.sqlite"  # inside CACHE_DIR
+SEARCH_REFRESH_INTERVAL = 2.0  # seconds between checks for changed files
+SEARCH_MAX_FILE_BYTES = 2 * 1024 * 1024  # larger files are not indexed
+SEARCH_INDEX_MAX_POSTINGS = 50_000_000  # (trigram, file) pairs; past it vendored/generated files are left out of search
+SEARCH_LOW_VALUE_DIRS = {"vendor", "vendors", "third_party", "thirdparty", "external", "generated", "site-packages"}
+SEARCH_LOW_VALUE_SUFFIXES = (".min.js", ".min.css", ".map", ".lock", "-lock.json", ".pb.go", "_pb2.py", ".snap", ".svg")
+SEARCH_MAX_RESULTS = 50  # matching lines per call
+SEARCH_CONTEXT_LINES = 2
+SEARCH_MAX_BYTES = 20_000  # output budget per call
+
+# Symbol index (swi.utils.symbols, outline_file / find_definition tools)
+SYMBOL_DB = "symbols.sqlite"  # inside CACHE_DIR, parsed symbols keyed by content hash
+SYMBOL_CACHE_ENTRIES = 512  # parsed files kept in memory
+OUTLINE_MAX_SYMBOLS = 400
+
+# Relevance retrieval before each user turn (swi.utils.bm25, CodingAgent.retrieve)
+RETRIEVE_ENABLED = True
+RETRIEVE_INDEX_DB = "bm25.sqlite"  # inside CACHE_DIR
+RETRIEVE_REFRESH_INTERVAL = 2.0  # seconds between checks for changed files
+RETRIEVE_MAX_FILE_BYTES = 512 * 1024  # larger files are not indexed
+RETRIEVE_PATH_WEIGHT = 3  # path terms count this many times
+RETRIEVE_TOP_K = 5  # files injected per user message
+RETRIEVE_TOKEN_BUDGET = 2_000  # approximate tokens of injected snippets
+RETRIEVE_SNIPPET_LINES = 40
+
+# LLM response cache (swi.utils.llm_cache, `swi --llm-cache MODE` or LLM_CACHE=MODE)
+LLM_CACHE_MODE = "off"  # off, auto, record or replay
+LLM_CACHE_DB = "llm_cache.sqlite"  # inside CACHE_DIR
+LLM_CACHE_MAX_BYTES = 256 * 1024 * 1024  # least recently used responses are evicted past this
+
+# Latency based routing across providers (swi.utils.routing, `swi --route` or ROUTE=...)
+ROUTING_PROVIDERS = ""  # "all" or comma separated provider names, empty disables routing
+ROUTING_HEDGE = True  # start a backup request when the chosen provider is slow
+ROUTING_STATS = "routing.json"  # inside CACHE_DIR, latencies carried across sessions
+ROUTING_WINDOW = 100  # latency samples kept per provider
+ROUTING_MIN_SAMPLES = 5  # below this a provider is still explored and hedged after the default delay
+ROUTING_HEDGE_QUANTILE = 0.95  # hedge once the first chunk is later than this latency percentile
+ROUTING_HEDGE_MIN_DELAY = 0.5  # seconds
+ROUTING_HEDGE_DEFAULT_DELAY = 5.0  # seconds, until enough samples exist
+ROUTING_MAX_ERROR_RATE = 0.5  # above this a provider is skipped ...
+ROUTING_COOLDOWN = 60.0  # ... for this many seconds after its last failure
+
+# Provider rate limiting (swi.utils.rate_limit), shared by every session in the process
+RATE_LIMIT_ENABLED = True
+# "provider" or "provider:deployment" -> (requests per minute, tokens per minute). None (or no entry)
+# leaves a dimension unlimited until the x-ratelimit-* response headers report the real quota.
+RATE_LIMITS = {}
+RATE_LIMIT_HEADROOM = 0.9  # fraction of the quota used, the rest absorbs estimate errors
+RATE_LIMIT_OUTPUT_TOKENS = 1024  # output tokens reserved per request when max_tokens is not set
+RATE_LIMIT_MAX_RETRIES = 5
+RATE_LIMIT_BACKOFF_BASE = 1.0  # seconds, doubled per attempt when the provider gives no retry-after
+RATE_LIMIT_BACKOFF_MAX = 60.0
+
+# Long term memory (swi.utils.memory, note_pad / recall tools)
+MEMORY_DB = "memory.sqlite"  # inside CACHE_DIR
+MEMORY_MAX_NOTES = 2_000  # least recently used notes are dropped past this
+MEMORY_MAX_NOTE_CHARS = 2_000
+MEMORY_RECALL_K = 5
+MEMORY_RECALL_MAX_CHARS = 1_500  # about 400 tokens per lookup
+
+# Terminal rendering of streamed output (swi.utils.renderer)
+RENDER_FPS = 15  # live region redraws per second, independent of the token rate
+RENDER_LIVE_LINES = 20  # tail of the streaming block shown while it grows
+RENDER_PREVIEW_LINES = 12  # longer tool output is collapsed to its first and last lines
+RENDER_KEEP_COLLAPSED = 50  # collapsed outputs that `/expand N` can still open
+
+# Large tool outputs (swi.utils.artifacts, ToolExecutor, read_artifact tool)
+ARTIFACT_DIR = "artifacts"  # inside CACHE_DIR, content addressed
+ARTIFACT_THRESHOLD_BYTES = 16_000  # larger tool results are kept out of the message history
+ARTIFACT_MAX_BYTES = 512 * 1024 * 1024  # least recently used artifacts are deleted past this
+ARTIFACT_PREVIEW_HEAD_LINES = 20  # lines of the output kept in the message ...
+ARTIFACT_PREVIEW_TAIL_LINES = 10  # ... from its start and its end
+ARTIFACT_PREVIEW_LINE_CHARS = 200
+ARTIFACT_READ_MAX_BYTES = 16_000  # read_artifact slices are cut here
+ARTIFACT_EXEMPT_TOOLS = {"read_artifact"}  # their output always stays inline
@@ -0,0 +1,105 @@
+import json
+import time
+import asyncio
+from typing import Any
+
+from pydantic import Field, PrivateAttr
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+def scripted(content: str = "", tool_calls: list[dict] = None) -> AIMessage:
+    """Build a scripted reply. Tool calls are (name, args) dicts, ids are filled in on replay."""
+    return AIMessage(
+        content=content,
+        tool_calls=[{"name": call["name"], "args": call["args"], "id": call.get("id", "")} for call in tool_calls or []],
+    )
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model replaying a fixed list of replies, for benchmarks and offline runs.
+
+    Replies are used in order and wrap around when the script runs out. A
+    compression request (its system prompt asks for a <state_snapshot>) is answered with
+    `summary` without consuming the script, so parallel summarisation does not
+    shift the replies of the main conversation. `latency` is waited before the
+    first token and `token_latency` between streamed words. Every reply reports
+    approximate usage, so token counts and compression behave as with a real model.
+    """
+
+    responses: list[AIMessage] = Field(default_factory=lambda: [AIMessage("Done.")])
+    summary: str = "<state_snapshot>Scripted summary.</state_snapshot>"
+    latency: float = 0.0
+    token_latency: float = 0.0
+
+    _index: int = PrivateAttr(default=0)
+    _calls: int = PrivateAttr(default=0)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        # Replies are scripted, the schemas only count towards the reported input tokens
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools])
+
+    def _next(self, messages: list[BaseMessage], tools: list = None) -> AIMessage:
+        self._calls += 1
+        if messages and "<state_snapshot>" in str(messages[0].content):
+            reply = AIMessage(self.summary)
+        else:
+            reply = self.responses[self._index % len(self.responses)]
+            self._index += 1
+        tool_calls = [
+            {**call, "id": call.get("id") or f"call_{self._calls}_{i}"}
+            for i, call in enumerate(reply.tool_calls)
+        ]
+        input_tokens = count_tokens_approximately(messages) + (len(json.dumps(tools)) // 4 if tools else 0)
+        output_tokens = count_tokens_approximately([reply])
+        return AIMessage(
+            content=reply.content,
+            tool_calls=tool_calls,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next(messages, kwargs.get("tools")))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next(messages, kwargs.get("tools")))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        reply = self._next(messages, kwargs.get("tools"))
+        await asyncio.sleep(self.latency)
+        words = reply.content.split(" ") if reply.content else []
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+        # Tool calls and usage arrive with the last chunk, as with OpenAI streaming
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content="",
+            tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                for i, call in enumerate(reply.tool_calls)
+            ],
+            usage_metadata=reply.usage_metadata,
+        ))
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "ScriptedChatModel":
+        """Load a script: a JSON list of {"content": str, "tool_calls": [{"name", "args"}]}."""
+        with open(path, "r", encoding="utf-8") as f:
+            steps = json.load(f)
+        return cls(responses=[scripted(step.get("content", ""), step.get("tool_calls")) for step in steps], **kwargs)
+
@@ -0,0 +1,95 @@
+import os
+import threading
+from collections import OrderedDict
+
+from swi.utils.config import FILE_CACHE_MAX_BYTES
+
+
+class FileCache:
+    """
+    LRU cache of file contents shared by the file tools.
+
+    Entries are keyed by path and validated against (mtime, size, inode), so a
+    file changed outside the agent is re-read on the next access. Decoded text
+    is cached next to the raw bytes. Writers call `invalidate` after writing.
+    """
+
+    def __init__(self, max_bytes: int = FILE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        # path -> [stat key, bytes, text or None]
+        self._entries: OrderedDict[str, list] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()  # sync tools run on executor threads
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(path: str) -> tuple:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    @staticmethod
+    def _cost(entry: list) -> int:
+        return len(entry[1]) + (len(entry[2]) if entry[2] is not None else 0)
+
+    def _entry(self, path: str) -> list:
+        path = os.path.abspath(path)
+        key = self._key(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        with open(path, "rb") as f:
+            data = f.read()
+        entry = [key, data, None]
+        with self._lock:
+            self._discard(path)
+            # Files bigger than the budget are served but never kept
+            if len(data) <= self.max_bytes:
+                self._entries[path] = entry
+                self._size += self._cost(entry)
+                self._evict()
+        return entry
+
+    def _discard(self, path: str):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._size -= self._cost(entry)
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._size -= self._cost(entry)
+
+    def read_bytes(self, path: str) -> bytes:
+        return self._entry(path)[1]
+
+    def read_text(self, path: str, encoding: str = "utf-8") -> str:
+        entry = self._entry(path)
+        if entry[2] is None:
+            text = entry[1].decode(encoding)
+            with self._lock:
+                entry[2] = text
+                if self._entries.get(os.path.abspath(path)) is entry:
+                    self._size += len(text)
+                    self._evict()
+        return entry[2]
+
+    def invalidate(self, path: str):
+        with self._lock:
+            self._discard(os.path.abspath(path))
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> str:
+        return f"file cache: {self.hits}/{self.hits + self.misses} hits ({self.hit_rate:.0%}), {self._size:,} bytes"
+
+
+file_cache = FileCache()
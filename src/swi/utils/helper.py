@@ -1,33 +1,175 @@
 import os
+import re
+from typing import Iterator
 
-def get_folder_tree(root_dir, ignore_dirs=None, prefix=""):
-    if ignore_dirs is None:
-        ignore_dirs = {"node_modules", ".git", ".build", "__pycache__", ".venv", ".idea"}
+from swi.utils.config import IGNORE_DIRS, TREE_COUNT_LIMIT
 
-    tree_str = ""
 
-    try:
-        entries = sorted(os.listdir(root_dir))
-    except PermissionError:
-        return prefix + "🚫 [Permission Denied]\n"
+def _translate(pattern: str, anchored: bool) -> str:
+    """Translate a single .gitignore glob into a regex."""
+    i, n = 0, len(pattern)
+    out = []
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[" and (end := pattern.find("]", i + 1)) != -1:
+            body = pattern[i + 1:end].replace("\\", "\\\\")
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append(f"[{body}]")
+            i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    body = "".join(out)
+    return ("^" if anchored else "^(?:.*/)?") + body + "$"
+
+
+def compile_glob(pattern: str) -> re.Pattern:
+    """Regex for a '/' separated glob where '*' stays in one folder and '**' spans folders."""
+    return re.compile(_translate(pattern, True))
+
 
-    for index, entry in enumerate(entries):
-        path = os.path.join(root_dir, entry)
-        connector = "├── " if index < len(entries) - 1 else "└── "
+class GitIgnore:
+    """
+    Minimal .gitignore matcher.
 
-        if os.path.isdir(path):
-            if entry in ignore_dirs:
+    Supports nested .gitignore files, negation (!), directory only rules (dir/),
+    anchored rules (/build, src/gen) and ** globs. Rules are loaded lazily per folder.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        # relative folder -> [(regex, negate, dir_only)]
+        self._rules: dict[str, list] = {}
+        # relative folder -> ignored, for the ancestor checks
+        self._dirs: dict[str, bool] = {}
+
+    def _load(self, rel_dir: str) -> list:
+        if rel_dir in self._rules:
+            return self._rules[rel_dir]
+        rules = []
+        try:
+            with open(os.path.join(self.root, rel_dir, ".gitignore"), "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except (OSError, UnicodeDecodeError):
+            lines = []
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith("#"):
                 continue
-            tree_str += prefix + connector + entry + "/\n"
-            extension = "│   " if index < len(entries) - 1 else "    "
-            tree_str += get_folder_tree(path, ignore_dirs, prefix + extension)
-        else:
-            tree_str += prefix + connector + entry + "\n"
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            if line.startswith("\\"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            rules.append((re.compile(_translate(line.lstrip("/"), anchored)), negate, dir_only))
+        self._rules[rel_dir] = rules
+        return rules
+
+    def reload(self, rel_dir: str):
+        """Forget the rules of a folder's .gitignore after it changed on disk."""
+        self._rules.pop(rel_dir.replace(os.sep, "/"), None)
+        self._dirs.clear()
 
-    return tree_str
+    def is_ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """
+        Check a path relative to the root. The last matching rule wins.
 
+        Like git, a path inside an ignored folder is ignored whatever the rules
+        say about the path itself, so 'dist/' also covers 'dist/bundle.js'.
+        """
+        parts = rel_path.replace(os.sep, "/").strip("/").split("/")
+        for i in range(1, len(parts)):
+            folder = "/".join(parts[:i])
+            if folder not in self._dirs:
+                self._dirs[folder] = self._match(parts[:i], True)
+            if self._dirs[folder]:
+                return True
+        return self._match(parts, is_dir)
 
-if __name__ == "__main__":
-    root_path = "."  # change to the folder you want
-    structure = root_path + "/\n" + get_folder_tree(root_path)
-    print(structure)
+    def _match(self, parts: list[str], is_dir: bool) -> bool:
+        ignored = False
+        for i in range(len(parts)):
+            sub_path = "/".join(parts[i:])
+            for regex, negate, dir_only in self._load("/".join(parts[:i])):
+                if dir_only and not is_dir:
+                    continue
+                if regex.match(sub_path):
+                    ignored = not negate
+        return ignored
+
+
+def count_files(path: str, limit: int = TREE_COUNT_LIMIT) -> int:
+    """Count files under a folder, giving up once `limit` is reached."""
+    count = 0
+    stack = [path]
+    while stack and count < limit:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        count += 1
+        except OSError:
+            continue
+    return count
+
+
+def iter_project_files(root: str, ignore_dirs=None, max_bytes: int = None) -> Iterator[tuple[str, os.stat_result]]:
+    """
+    Yield (relative path, stat) for the files under `root`.
+
+    Ignored folders, .gitignore matches and symlinks are skipped, as are files
+    larger than `max_bytes`. Paths use '/' separators.
+    """
+    if ignore_dirs is None:
+        ignore_dirs = IGNORE_DIRS
+    gitignore = GitIgnore(root)
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            with os.scandir(os.path.join(root, rel_dir)) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in ignore_dirs and not gitignore.is_ignored(rel_path, True):
+                        stack.append(rel_path)
+                elif entry.is_file(follow_symlinks=False) and not gitignore.is_ignored(rel_path, False):
+                    st = entry.stat()
+                    if max_bytes is None or st.st_size <= max_bytes:
+                        yield rel_path, st
+            except OSError:
+                continue
+
+
+def read_text_file(abs_path: str) -> bytes:
+    """Raw content of a text file, or None for binary and unreadable files."""
+    try:
+        with open(abs_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    return None if b"\0" in data[:8192] else data
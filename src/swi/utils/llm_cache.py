@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any
+
+from langchain_core.messages import AIMessage, message_to_dict, messages_from_dict
+from langchain_core.messages.utils import message_chunk_to_message
+
+from swi.utils.config import CACHE_DIR, LLM_CACHE_DB, LLM_CACHE_MAX_BYTES
+from swi.utils.wrappers import ChatModelWrapper, message_to_chunk, result_from_message
+
+CACHE_MODES = ("off", "auto", "record", "replay")
+
+SCHEMA = """
+PRAGMA journal_mode=WAL;
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+class CacheMiss(RuntimeError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+class ResponseStore:
+    """SQLite store of model responses, evicting the least recently used past `max_bytes`."""
+
+    def __init__(self, path: str = None, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.path = path or os.path.join(CACHE_DIR, LLM_CACHE_DB)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> AIMessage:
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self.conn:
+                self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        return messages_from_dict([json.loads(row[0])])[0]
+
+    def put(self, key: str, message: AIMessage):
+        data = json.dumps(message_to_dict(message))
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, data, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop the oldest entries until the store is back under 90% of the budget
+        excess = total - int(self.max_bytes * 0.9)
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            if excess <= 0:
+                break
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            excess -= size
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        return f"llm cache: {self.hits}/{total} hits" if total else "llm cache: no requests"
+
+
+def _canonical_message(message) -> dict:
+    """The parts of a message the provider sees. Ids and metadata vary between runs."""
+    data = {"type": message.type, "content": message.content}
+    if getattr(message, "tool_calls", None):
+        data["tool_calls"] = [{"name": c["name"], "args": c["args"], "id": c.get("id")} for c in message.tool_calls]
+    if getattr(message, "tool_call_id", None):
+        data["tool_call_id"] = message.tool_call_id
+    if message.name:
+        data["name"] = message.name
+    return data
+
+
+class CachedChatModel(ChatModelWrapper):
+    """
+    Exact-match response cache around a chat model.
+
+    The key is a sha256 of the canonical request: model parameters, messages,
+    stop words and bound kwargs (tool schemas included). Modes:
+        off     always call the model
+        auto    serve hits, call and store on a miss
+        record  always call the model and overwrite the stored response
+        replay  serve hits, raise CacheMiss instead of calling the model
+    """
+
+    mode: str = "auto"
+    store: Any = None
+
+    def model_post_init(self, __context):
+        if self.mode not in CACHE_MODES:
+            raise ValueError(f"LLM cache mode must be one of {', '.join(CACHE_MODES)}, got {self.mode!r}")
+        if self.store is None:
+            self.store = ResponseStore()
+
+    def cache_key(self, messages, stop=None, **kwargs) -> str:
+        request = {
+            "model": self.inner._llm_type,
+            "params": self.inner._identifying_params,
+            "messages": [_canonical_message(message) for message in messages],
+            "stop": stop,
+            "kwargs": kwargs,
+        }
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str) -> AIMessage:
+        if self.mode in ("auto", "replay"):
+            if (message := self.store.get(key)) is not None:
+                message.response_metadata = {**message.response_metadata, "cache": "hit"}
+                return message
+        if self.mode == "replay":
+            raise CacheMiss(f"No recorded response for request {key[:12]} (LLM cache is in replay mode)")
+        return None
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        if self.mode == "off":
+            return super()._generate(messages, stop=stop, **kwargs)
+        key = self.cache_key(messages, stop, **kwargs)
+        if (message := self._lookup(key)) is not None:
+            return result_from_message(message)
+        result = super()._generate(messages, stop=stop, **kwargs)
+        self.store.put(key, result.generations[0].message)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        if self.mode == "off":
+            return await super()._agenerate(messages, stop=stop, **kwargs)
+        key = self.cache_key(messages, stop, **kwargs)
+        if (message := self._lookup(key)) is not None:
+            return result_from_message(message)
+        result = await super()._agenerate(messages, stop=stop, **kwargs)
+        self.store.put(key, result.generations[0].message)
+        return result
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        if self.mode == "off":
+            async for chunk in super()._astream(messages, stop=stop, **kwargs):
+                yield chunk
+            return
+        key = self.cache_key(messages, stop, **kwargs)
+        if (message := self._lookup(key)) is not None:
+            yield message_to_chunk(message)
+            return
+        merged = None
+        async for chunk in super()._astream(messages, stop=stop, **kwargs):
+            merged = chunk.message if merged is None else merged + chunk.message
+            yield chunk
+        # Interrupted or empty streams are not stored
+        if merged is not None:
+            self.store.put(key, message_chunk_to_message(merged))
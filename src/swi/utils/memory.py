@@ -0,0 +1,204 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from dataclasses import dataclass
+
+from swi.utils.config import CACHE_DIR, NOTEPAD, MEMORY_DB, MEMORY_MAX_NOTES, MEMORY_MAX_NOTE_CHARS
+
+NOTES_TABLE = """
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    key TEXT UNIQUE,
+    text TEXT NOT NULL,
+    tags TEXT NOT NULL DEFAULT ',',
+    hash TEXT NOT NULL,
+    created REAL NOT NULL,
+    used REAL NOT NULL
+);
+"""
+
+SCHEMA = """
+PRAGMA journal_mode=WAL;
+""" + NOTES_TABLE + """
+-- The same text is one note unless it is stored under different keys
+CREATE UNIQUE INDEX IF NOT EXISTS notes_unkeyed_hash ON notes (hash) WHERE key IS NULL;
+CREATE INDEX IF NOT EXISTS notes_hash ON notes (hash);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    text, key, tags, content='notes', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts (rowid, text, key, tags) VALUES (new.id, new.text, new.key, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, text, key, tags) VALUES ('delete', old.id, old.text, old.key, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_au AFTER UPDATE ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, text, key, tags) VALUES ('delete', old.id, old.text, old.key, old.tags);
+    INSERT INTO notes_fts (rowid, text, key, tags) VALUES (new.id, new.text, new.key, new.tags);
+END;
+"""
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class Note:
+    id: int
+    key: str
+    text: str
+    tags: list[str]
+
+
+def _digest(text: str) -> str:
+    """Notes differing only in case or whitespace are the same note."""
+    return hashlib.sha1(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+
+def _tags(tags) -> list[str]:
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    return sorted({tag.strip().lower() for tag in tags or [] if tag.strip()})
+
+
+def _match_query(query: str) -> str:
+    """Any of the query words, quoted so FTS5 syntax in user text is never interpreted."""
+    terms = _TERM.findall(query)
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class MemoryStore:
+    """
+    Long term notes of the agent in `.swi/memory.sqlite`, searchable with FTS5.
+
+    A note can carry a key (storing under an existing key replaces it) and
+    tags. Duplicate texts are merged unless they are under different keys,
+    notes are capped at MEMORY_MAX_NOTE_CHARS and the least recently used
+    notes are dropped past MEMORY_MAX_NOTES.
+    """
+
+    def __init__(self, root: str = "./", path: str = None):
+        self.root = os.path.abspath(root)
+        self.path = path or os.path.join(self.root, CACHE_DIR, MEMORY_DB)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._migrate()
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self._import_notepad(os.path.join(self.root, NOTEPAD))
+
+    def _migrate(self):
+        """Stores created before keyed notes could share a text had a unique hash column."""
+        row = self.conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'notes'").fetchone()
+        if row is None or "hash TEXT UNIQUE" not in row[0]:
+            return
+        # Same ids and texts, so the FTS index stays valid; SCHEMA recreates the triggers
+        self.conn.executescript(
+            "BEGIN;"
+            "DROP TRIGGER IF EXISTS notes_ai; DROP TRIGGER IF EXISTS notes_ad; DROP TRIGGER IF EXISTS notes_au;"
+            "ALTER TABLE notes RENAME TO notes_old;"
+            + NOTES_TABLE +
+            "INSERT INTO notes SELECT id, key, text, tags, hash, created, used FROM notes_old;"
+            "DROP TABLE notes_old;"
+            "COMMIT;"
+        )
+
+    def _import_notepad(self, path: str):
+        """Carry over the old append-only NOTEPAD file. Dedup makes this a no-op after the first time."""
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                text = f.read().strip()
+        except OSError:
+            return
+        chunk = ""
+        for line in text.splitlines():
+            if chunk and len(chunk) + len(line) + 1 > MEMORY_MAX_NOTE_CHARS:
+                self.add(chunk, tags=["notepad"])
+                chunk = ""
+            chunk = f"{chunk}\n{line}" if chunk else line[:MEMORY_MAX_NOTE_CHARS]
+        if chunk.strip():
+            self.add(chunk, tags=["notepad"])
+
+    def add(self, text: str, key: str = None, tags=None) -> tuple[int, str]:
+        """Store a note. Returns (id, 'stored' | 'updated' | 'duplicate')."""
+        text = text.strip()
+        if not text:
+            raise ValueError("Note is empty")
+        if len(text) > MEMORY_MAX_NOTE_CHARS:
+            raise ValueError(f"Note is {len(text)} characters, the limit is {MEMORY_MAX_NOTE_CHARS}; store a shorter summary")
+        tags = _tags(tags)
+        digest = _digest(text)
+        now = time.time()
+        with self.lock, self.conn:
+            # A note is only merged into one with the same key (or both without a key),
+            # dedup never touches a note stored under another key
+            if key is None:
+                same = self.conn.execute("SELECT id, tags FROM notes WHERE hash = ? AND key IS NULL", (digest,)).fetchone()
+            else:
+                same = self.conn.execute("SELECT id, tags, hash FROM notes WHERE key = ?", (key,)).fetchone()
+            if same is not None:
+                merged = ",".join(_tags(same[1].split(",") + tags))
+                if key is None or same[2] == digest:
+                    self.conn.execute("UPDATE notes SET tags = ?, used = ? WHERE id = ?", (f",{merged},", now, same[0]))
+                    return same[0], "duplicate"
+                # New text under the key, the tags given so far are kept
+                self.conn.execute(
+                    "UPDATE notes SET text = ?, tags = ?, hash = ?, used = ? WHERE id = ?",
+                    (text, f",{merged},", digest, now, same[0]),
+                )
+                return same[0], "updated"
+            note_id = self.conn.execute(
+                "INSERT INTO notes (key, text, tags, hash, created, used) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, text, f",{','.join(tags)},", digest, now, now),
+            ).lastrowid
+            self._evict()
+        return note_id, "stored"
+
+    def _evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+        if count > MEMORY_MAX_NOTES:
+            self.conn.execute(
+                "DELETE FROM notes WHERE id IN (SELECT id FROM notes ORDER BY used LIMIT ?)", (count - MEMORY_MAX_NOTES,)
+            )
+
+    def delete(self, key: str) -> bool:
+        with self.lock, self.conn:
+            return self.conn.execute("DELETE FROM notes WHERE key = ?", (key,)).rowcount > 0
+
+    def search(self, query: str = "", k: int = 5, tag: str = None) -> list[Note]:
+        """Best `k` notes for the query by BM25, or the most recently used ones without a query."""
+        match = _match_query(query or "")
+        tag_filter = f"%,{tag.strip().lower()},%" if tag else "%"
+        with self.lock:
+            if match:
+                rows = self.conn.execute(
+                    "SELECT n.id, n.key, n.text, n.tags FROM notes_fts JOIN notes n ON n.id = notes_fts.rowid "
+                    "WHERE notes_fts MATCH ? AND n.tags LIKE ? ORDER BY bm25(notes_fts) LIMIT ?",
+                    (match, tag_filter, k),
+                ).fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT id, key, text, tags FROM notes WHERE tags LIKE ? ORDER BY used DESC LIMIT ?",
+                    (tag_filter, k),
+                ).fetchall()
+            if rows:
+                with self.conn:
+                    self.conn.executemany("UPDATE notes SET used = ? WHERE id = ?", [(time.time(), row[0]) for row in rows])
+        return [Note(row[0], row[1], row[2], [tag for tag in row[3].split(",") if tag]) for row in rows]
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+
+_stores: dict[str, MemoryStore] = {}
+
+
+def get_memory_store(root: str = "./") -> MemoryStore:
+    """Return the process wide MemoryStore for a root folder."""
+    abs_root = os.path.abspath(root)
+    if abs_root not in _stores:
+        _stores[abs_root] = MemoryStore(abs_root)
+    return _stores[abs_root]
@@ -1,7 +1,10 @@
 import os
+import json
+import time
+import hashlib
 from rich.console import Console
 from rich.prompt import Prompt
-from swi.utils.config import ENV_FILE
+from swi.utils.config import ENV_FILE, CACHE_DIR, VALIDATION_CACHE, VALIDATION_TTL, LLM_CACHE_MODE, ROUTING_PROVIDERS, ROUTING_HEDGE, RATE_LIMIT_ENABLED
 from rich.console import Console
 from rich.prompt import Prompt
 from rich.table import Table
@@ -11,6 +14,9 @@ console = Console()
 
 # Base class for all models
 class BaseModelLoader:
+    required_env_vars: list[str] = []
+    _model = None
+
     def load(self):
         """Return a model instance. Must be implemented by subclasses."""
         raise NotImplementedError
@@ -18,6 +24,42 @@ class BaseModelLoader:
         """Checks if the model keys are present"""
         raise NotImplementedError
 
+    def model(self):
+        """Return the loaded model, building it once. `check` and `load` share this client."""
+        if self._model is None:
+            self._model = self.load()
+        return self._model
+
+    def replay_model(self):
+        """
+        Client for replaying recorded responses, built without the real keys.
+
+        The replay cache never lets a request through, so missing keys get a
+        placeholder; the client keeps the model parameters the responses were
+        recorded under. It is not kept in `_model`, `check` never sees it.
+        """
+        missing = [var for var in self.required_env_vars if not os.getenv(var)]
+        for var in missing:
+            os.environ[var] = "https://replay.invalid" if var.endswith("ENDPOINT") else "replay"
+        try:
+            return self.load()
+        finally:
+            for var in missing:
+                os.environ.pop(var, None)
+
+    def cache_kwargs(self, cache_key: str) -> dict:
+        """Extra request arguments that help the provider reuse a cached prompt prefix."""
+        return {}
+
+    def available(self) -> bool:
+        """True if every key this provider needs is set, without calling it."""
+        return bool(self.required_env_vars) and all(os.getenv(var) for var in self.required_env_vars)
+
+    def fingerprint(self) -> str:
+        """Hash of the credentials, so a cached validation is dropped when a key changes."""
+        values = "\0".join(f"{var}={os.getenv(var, '')}" for var in self.required_env_vars)
+        return hashlib.sha256(values.encode("utf-8")).hexdigest()
+
     def find_missing(self):
         """Checks for all missing env var"""
         missing = [var for var in self.required_env_vars if not os.getenv(var)]
@@ -32,6 +74,8 @@ class BaseModelLoader:
                 with open(ENV_FILE,"a") as f:
                     f.write(f"{key}={value}\n")
                     os.environ[key] = value
+            # The cached client was built with the old values
+            self._model = None
             if self.check():
                 break 
             console.print("[bold red]alert![/bold red] The key entered is not valid Try again !!!")    
@@ -50,9 +94,7 @@ class AzureOpenAILoader(BaseModelLoader):
     
     def check(self):
         try:
-            from openai import AzureOpenAI
-            client = AzureOpenAI(api_key=os.getenv('AZURE_OPENAI_API_KEY'), azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),api_version=os.getenv("OPENAI_API_VERSION"))
-            client.models.list()
+            self.model().root_client.models.list()
             return True
         except ImportError:
             console.print("You dont have openai installed")
@@ -74,7 +116,11 @@ class AzureOpenAILoader(BaseModelLoader):
             deployment_name=os.getenv("AZURE_OPENAI_DEPLOYMENT", "default"),
             api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-05-01-preview"),
             temperature=0,
-            azure_deployment = os.getenv("AZURE_DEPLOYMENT","gpt-4o-mini")
+            azure_deployment = os.getenv("AZURE_DEPLOYMENT","gpt-4o-mini"),
+            stream_usage=True,
+            # Retries and rate limits are handled by swi.utils.rate_limit
+            max_retries=0,
+            include_response_headers=True,
         )
 
 
@@ -85,12 +131,11 @@ class GroqLoader(BaseModelLoader):
     
     def check(self):
         try:
-            from groq import Groq
-            client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-            client.models.list()
+            # ChatGroq.client is the chat.completions resource, _client is the Groq client
+            self.model().client._client.models.list()
             return True
         except ImportError:
-            console.print("You dont have openai installed")
+            console.print("You dont have groq installed")
             exit()
         except Exception:
             return False
@@ -103,17 +148,23 @@ class GroqLoader(BaseModelLoader):
         return ChatGroq(
             groq_api_key=api_key,
             model=os.getenv("GROQ_MODEL", "mixtral-8x7b-32768"),
-            temperature=0
+            temperature=0,
+            max_retries=0,
         )
 
 
 class OpenAILoader(BaseModelLoader):
+    required_env_vars = [
+        "OPENAI_API_KEY"
+    ]
+
+    def cache_kwargs(self, cache_key: str) -> dict:
+        # Routes requests sharing the static prompt to the same cache
+        return {"prompt_cache_key": cache_key}
 
     def check(self):
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            client.models.list()
+            self.model().root_client.models.list()
             return True
         except ImportError:
             console.print("You dont have openai installed")
@@ -129,21 +180,49 @@ class OpenAILoader(BaseModelLoader):
         return ChatOpenAI(
             api_key=api_key,
             model=os.getenv("OPENAI_MODEL", "gpt-4o"),
-            temperature=0
+            temperature=0,
+            stream_usage=True,
+            max_retries=0,
+            include_response_headers=True,
         )
 
 
+class FakeLoader(BaseModelLoader):
+    """Scripted offline model for benchmarks and demos, no keys or network needed."""
+
+    def __init__(self, script: list = None, latency: float = None, token_latency: float = None):
+        self.script = script
+        self.latency = float(os.getenv("FAKE_LATENCY", 0)) if latency is None else latency
+        self.token_latency = float(os.getenv("FAKE_TOKEN_LATENCY", 0)) if token_latency is None else token_latency
+
+    def check(self):
+        return True
+
+    def load(self):
+        from swi.utils.fake_model import ScriptedChatModel
+        options = {"latency": self.latency, "token_latency": self.token_latency}
+        if self.script is not None:
+            return ScriptedChatModel(responses=self.script, **options)
+        if path := os.getenv("FAKE_SCRIPT"):
+            return ScriptedChatModel.from_file(path, **options)
+        return ScriptedChatModel(**options)
+
+
 # ------------------------
 # Main loader (registry)
 # ------------------------
 class ModelLoader:
     """Extensible model loader using provider classes."""
-    def __init__(self):
+    def __init__(self, provider: str = None):
         self.console = console
+        self.provider: str = provider
+        self.validation_path = os.path.join(CACHE_DIR, VALIDATION_CACHE)
+        self.routes: list[str] = []
         self.providers = {
             "azure-openai": AzureOpenAILoader(),
             "groq": GroqLoader(),
             "openai": OpenAILoader(),
+            "fake": FakeLoader(),
             # Add more model if need it
         }
         
@@ -152,19 +231,64 @@ class ModelLoader:
         if provider_name:
             if provider_name not in self.providers:
                 raise ValueError(f"Provider {provider_name} not registered")
-            if self.providers[provider_name].check():
+            loader = self.providers[provider_name]
+            if self._is_validated(provider_name, loader):
                 return True
-            self.providers[provider_name].find_missing()
+            if not loader.check():
+                # Exits after three failed attempts
+                loader.find_missing()
+            self._mark_validated(provider_name, loader)
+            return True
         else:
             return False
 
+    # -------------------------------
+    # Validation cache
+    # -------------------------------
+    def _read_validations(self) -> dict:
+        try:
+            with open(self.validation_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _is_validated(self, provider_name: str, loader: BaseModelLoader) -> bool:
+        """True if these exact keys passed a live check within VALIDATION_TTL."""
+        entry = self._read_validations().get(provider_name)
+        if not entry or entry.get("fingerprint") != loader.fingerprint():
+            return False
+        return time.time() - entry.get("time", 0) < VALIDATION_TTL
+
+    def _mark_validated(self, provider_name: str, loader: BaseModelLoader):
+        data = self._read_validations()
+        data[provider_name] = {"fingerprint": loader.fingerprint(), "time": time.time()}
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(self.validation_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+        except OSError:
+            pass
+
+
+    def cache_kwargs(self, cache_key: str) -> dict:
+        """Prompt cache hints for the detected provider."""
+        if self.routes:
+            # RoutingChatModel hands each provider only its own hints
+            return {"backend_kwargs": {name: self.providers[name].cache_kwargs(cache_key) for name in self.routes}}
+        provider_name = self._detect_model()
+        if provider_name in self.providers:
+            return self.providers[provider_name].cache_kwargs(cache_key)
+        return {}
 
     def _detect_model(self) -> str:
         """Detect available model backend (azure_openai, groq, openai).
            Returns model name as string, or raises error if not found.
         """
+        if self.provider:
+            return self.provider
         if os.getenv("PROVIDER"):
-            return os.getenv("PROVIDER") 
+            self.provider = os.getenv("PROVIDER")
+            return self.provider
         available_packages = ["azure-openai","openai","groq"]
         # Priority order (you can change it)
         # Display nice table of choices
@@ -187,10 +311,65 @@ class ModelLoader:
             console.print(f"[cyan]You selected:[/cyan] {selected}")
             with open(ENV_FILE,"a") as f:
                 f.write(f"PROVIDER={selected}\n")
+            os.environ["PROVIDER"] = selected
+            self.provider = selected
             return selected
 
 
             
+    def _route_names(self, primary: str) -> list[str]:
+        """Providers to route between, from ROUTE ("all" or a comma separated list)."""
+        setting = os.getenv("ROUTE", ROUTING_PROVIDERS)
+        if not setting:
+            return []
+        if setting == "all":
+            names = [name for name, loader in self.providers.items() if loader.available()]
+        else:
+            names = [name.strip() for name in setting.split(",") if name.strip()]
+            unknown = [name for name in names if name not in self.providers]
+            if unknown:
+                raise ValueError(f"Provider {', '.join(unknown)} not registered")
+        return ([primary] if primary in names else []) + [name for name in names if name != primary]
+
+    def _with_routing(self, primary: str, model):
+        """Route between providers when ROUTE names at least two of them."""
+        backends = {}
+        for name in self._route_names(primary):
+            try:
+                backends[name] = model if name == primary else self._limited(name, self._provider_model(name))
+            except Exception:
+                self.console.print(f"[yellow]Provider {name} could not be loaded, not routing to it[/]")
+        if len(backends) < 2:
+            return model
+        from swi.utils.routing import RoutingChatModel
+        self.routes = list(backends)
+        hedge = os.getenv("ROUTE_HEDGE", "1" if ROUTING_HEDGE else "0") != "0"
+        return RoutingChatModel(inner=next(iter(backends.values())), backends=backends, hedge=hedge)
+
+    def _limited(self, name: str, model):
+        """Send the provider's calls through the process wide rate limiter."""
+        if not RATE_LIMIT_ENABLED:
+            return model
+        from swi.utils.rate_limit import RateLimitedChatModel
+        deployment = getattr(model, "deployment_name", None) or getattr(model, "model_name", None) or ""
+        return RateLimitedChatModel(inner=model, key=f"{name}:{deployment}")
+
+    def _replaying(self) -> bool:
+        return os.getenv("LLM_CACHE", LLM_CACHE_MODE) == "replay"
+
+    def _provider_model(self, name: str):
+        """The provider's client, a keyless one when every response comes from the replay cache."""
+        loader = self.providers[name]
+        return loader.replay_model() if self._replaying() else loader.model()
+
+    def _with_cache(self, model):
+        """Wrap the model in the response cache unless LLM_CACHE is off."""
+        mode = os.getenv("LLM_CACHE", LLM_CACHE_MODE)
+        if mode == "off":
+            return model
+        from swi.utils.llm_cache import CachedChatModel
+        return CachedChatModel(inner=model, mode=mode)
+
     def load(self):
         """
         Load model by provider name.
@@ -200,14 +379,15 @@ class ModelLoader:
         if provider_name:
             if provider_name not in self.providers:
                 raise ValueError(f"Provider {provider_name} not registered")
-            return self.providers[provider_name].load()
+            model = self._limited(provider_name, self._provider_model(provider_name))
+            return self._with_cache(self._with_routing(provider_name, model))
 
         # Auto-select first provider with valid keys
         for name, loader in self.providers.items():
             try:
                 model = loader.load()
                 self.console.print(f"[cyan]Loaded model from {name}[/]")
-                return model
+                return self._with_cache(self._limited(name, model))
             except Exception:
                 continue
 
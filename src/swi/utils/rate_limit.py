@@ -0,0 +1,346 @@
+import json
+import time
+import heapq
+import random
+import asyncio
+import itertools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from langchain_core.messages.utils import count_tokens_approximately
+
+from swi.utils.config import (
+    RATE_LIMITS,
+    RATE_LIMIT_HEADROOM,
+    RATE_LIMIT_OUTPUT_TOKENS,
+    RATE_LIMIT_MAX_RETRIES,
+    RATE_LIMIT_BACKOFF_BASE,
+    RATE_LIMIT_BACKOFF_MAX,
+)
+from swi.utils.tracing import tracer
+from swi.utils.wrappers import ChatModelWrapper
+
+# Lower runs first. Set around a call with `with priority(BACKGROUND):`
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_priority: ContextVar[int] = ContextVar("swi_rate_limit_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(level: int):
+    """Run the model calls inside the block at this scheduling priority."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def estimate_tokens(messages, kwargs: dict) -> int:
+    """Tokens a request counts against TPM before it is sent: prompt, tool schemas and reserved output."""
+    tools = kwargs.get("tools")
+    output = kwargs.get("max_tokens") or kwargs.get("max_completion_tokens") or RATE_LIMIT_OUTPUT_TOKENS
+    return count_tokens_approximately(messages) + (len(json.dumps(tools, default=str)) // 4 if tools else 0) + output
+
+
+def parse_duration(value: str) -> float:
+    """Seconds from a rate limit header: '1.5', '20ms', '6m0s', '1h2m3.5s'."""
+    if value is None:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total, number = 0.0, ""
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    i = 0
+    while i < len(value):
+        char = value[i]
+        if char.isdigit() or char == ".":
+            number += char
+            i += 1
+            continue
+        unit = "ms" if value.startswith("ms", i) else char
+        if unit not in units or not number:
+            return None
+        total += float(number) * units[unit]
+        number = ""
+        i += len(unit)
+    return total
+
+
+def _headers(error: Exception) -> dict:
+    response = getattr(error, "response", None)
+    return dict(getattr(response, "headers", None) or {})
+
+
+def _status(error: Exception) -> int:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, overloaded or failing servers and dropped connections."""
+    status = _status(error)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    name = type(error).__name__
+    return "RateLimit" in name or "Timeout" in name or "Connection" in name
+
+
+def retry_after(headers: dict) -> float:
+    """Wait requested by the provider, in seconds."""
+    headers = {key.lower(): value for key, value in headers.items()}
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    for key in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        if (seconds := parse_duration(headers.get(key))) is not None:
+            return seconds
+    return None
+
+
+class TokenBucket:
+    """Budget refilled continuously at `per_minute` / 60 per second, holding at most `per_minute`."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available. Requests larger than the bucket only need it full."""
+        self._refill()
+        needed = min(amount, self.capacity) - self.tokens
+        return max(0.0, needed * 60 / self.capacity) if needed > 0 else 0.0
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= amount
+
+    def resize(self, per_minute: float):
+        self._refill()
+        self.tokens = min(self.tokens, per_minute)
+        self.capacity = per_minute
+
+
+class Limit:
+    """RPM and TPM buckets of one provider deployment, and the requests waiting for them."""
+
+    def __init__(self, rpm: float = None, tpm: float = None):
+        self.requests = TokenBucket(rpm * RATE_LIMIT_HEADROOM) if rpm else None
+        self.tokens = TokenBucket(tpm * RATE_LIMIT_HEADROOM) if tpm else None
+        self.blocked_until = 0.0
+        self.waiters = []  # heap of (priority, sequence, future, tokens)
+        self.timer = None
+        self.lock = threading.Lock()
+
+    def wait_time(self, tokens: int) -> float:
+        wait = max(0.0, self.blocked_until - time.monotonic())
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_time(tokens))
+        return wait
+
+    def take(self, tokens: int):
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(tokens)
+
+    def sync(self, headers: dict):
+        """Follow the quota the provider reports instead of the configured guess."""
+        headers = {key.lower(): value for key, value in headers.items()}
+        for kind, attr in (("requests", "requests"), ("tokens", "tokens")):
+            try:
+                limit = float(headers[f"x-ratelimit-limit-{kind}"])
+                remaining = float(headers[f"x-ratelimit-remaining-{kind}"])
+            except (KeyError, ValueError):
+                continue
+            bucket = getattr(self, attr)
+            if bucket is None:
+                bucket = TokenBucket(limit * RATE_LIMIT_HEADROOM)
+                setattr(self, attr, bucket)
+            else:
+                bucket.resize(limit * RATE_LIMIT_HEADROOM)
+            # Other processes share the quota: never believe we have more than the server says
+            bucket.tokens = min(bucket.tokens, remaining - limit * (1 - RATE_LIMIT_HEADROOM))
+
+
+class RateLimiter:
+    """
+    Process wide scheduler in front of every provider call.
+
+    Each provider deployment has token buckets for requests and tokens per
+    minute, sized from RATE_LIMITS and corrected by the x-ratelimit-* headers
+    of each response. Requests wait in a priority queue (interactive before
+    background) until both buckets can take them, so all sessions together
+    stay just under the quota. A 429 pauses the whole deployment for the
+    provider's retry-after instead of each session retrying on its own.
+    """
+
+    def __init__(self):
+        self.limits: dict[str, Limit] = {}
+        self.sequence = itertools.count()
+
+    def limit(self, key: str) -> Limit:
+        if key not in self.limits:
+            provider = key.split(":", 1)[0]
+            rpm, tpm = RATE_LIMITS.get(key) or RATE_LIMITS.get(provider) or (None, None)
+            self.limits[key] = Limit(rpm, tpm)
+        return self.limits[key]
+
+    def _pump(self, limit: Limit):
+        """Admit waiters in priority order while the buckets allow, then sleep until the head fits."""
+        limit.timer = None
+        while limit.waiters:
+            _, _, future, tokens = limit.waiters[0]
+            # Futures of an earlier event loop (e.g. a finished benchmark run) never resolve
+            if future.done() or future.get_loop() is not asyncio.get_running_loop():
+                heapq.heappop(limit.waiters)
+                continue
+            wait = limit.wait_time(tokens)
+            if wait > 0:
+                limit.timer = asyncio.get_running_loop().call_later(wait, self._pump, limit)
+                return
+            heapq.heappop(limit.waiters)
+            limit.take(tokens)
+            future.set_result(None)
+
+    async def acquire(self, key: str, tokens: int):
+        limit = self.limit(key)
+        if not limit.waiters and limit.wait_time(tokens) == 0:
+            limit.take(tokens)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(limit.waiters, (_priority.get(), next(self.sequence), future, tokens))
+        if limit.timer is not None:
+            limit.timer.cancel()
+        self._pump(limit)
+        with tracer.span("rate_limit:wait", key=key, tokens=tokens, priority=_priority.get()):
+            await future
+
+    def acquire_sync(self, key: str, tokens: int):
+        limit = self.limit(key)
+        with limit.lock:
+            while (wait := limit.wait_time(tokens)) > 0:
+                time.sleep(wait)
+            limit.take(tokens)
+
+    def settle(self, key: str, estimated: int, used: int = None, headers: dict = None):
+        """Return unused reserved tokens, or charge the overshoot, once the real usage is known."""
+        limit = self.limit(key)
+        if used is not None and limit.tokens:
+            limit.tokens.take(used - estimated)
+        if headers:
+            limit.sync(headers)
+
+    def backoff(self, key: str, error: Exception, attempt: int) -> float:
+        """Pause the deployment after a retryable error and return the delay with jitter."""
+        delay = retry_after(_headers(error))
+        if delay is None:
+            delay = min(RATE_LIMIT_BACKOFF_MAX, RATE_LIMIT_BACKOFF_BASE * 2 ** attempt)
+            # Equal jitter: half fixed, half random, so waiting sessions spread out
+            delay = delay / 2 + random.uniform(0, delay / 2)
+        else:
+            delay += random.uniform(0, min(1.0, delay * 0.25))
+        limit = self.limit(key)
+        if _status(error) == 429 or "RateLimit" in type(error).__name__:
+            limit.blocked_until = max(limit.blocked_until, time.monotonic() + delay)
+        return delay
+
+
+rate_limiter = RateLimiter()
+
+
+def _usage(message) -> int:
+    usage = getattr(message, "usage_metadata", None)
+    return usage.get("total_tokens") if usage else None
+
+
+class RateLimitedChatModel(ChatModelWrapper):
+    """
+    Sends calls through the shared rate limiter and retries retryable errors.
+
+    `key` identifies the quota, "provider:deployment". The wrapped model should
+    have its own retries disabled (max_retries=0) so only the scheduler retries.
+    Streams are retried only if they fail before their first chunk.
+    """
+
+    key: str
+    limiter: Any = None
+
+    def model_post_init(self, __context):
+        if self.limiter is None:
+            self.limiter = rate_limiter
+
+    def _headers(self, generation) -> dict:
+        # Read and drop them, they should not end up in the checkpointed messages
+        info = generation.generation_info or {}
+        return info.pop("headers", None)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        estimate = estimate_tokens(messages, kwargs)
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            self.limiter.acquire_sync(self.key, estimate)
+            try:
+                result = super()._generate(messages, stop=stop, **kwargs)
+            except Exception as e:
+                self.limiter.settle(self.key, estimate, 0)
+                if attempt == RATE_LIMIT_MAX_RETRIES or not is_retryable(e):
+                    raise
+                time.sleep(self.limiter.backoff(self.key, e, attempt))
+                continue
+            generation = result.generations[0]
+            self.limiter.settle(self.key, estimate, _usage(generation.message), self._headers(generation))
+            return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        estimate = estimate_tokens(messages, kwargs)
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            await self.limiter.acquire(self.key, estimate)
+            try:
+                result = await super()._agenerate(messages, stop=stop, **kwargs)
+            except Exception as e:
+                self.limiter.settle(self.key, estimate, 0)
+                if attempt == RATE_LIMIT_MAX_RETRIES or not is_retryable(e):
+                    raise
+                await asyncio.sleep(self.limiter.backoff(self.key, e, attempt))
+                continue
+            generation = result.generations[0]
+            self.limiter.settle(self.key, estimate, _usage(generation.message), self._headers(generation))
+            return result
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        estimate = estimate_tokens(messages, kwargs)
+        for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+            await self.limiter.acquire(self.key, estimate)
+            started, used, headers = False, None, None
+            try:
+                async for chunk in super()._astream(messages, stop=stop, **kwargs):
+                    started = True
+                    headers = self._headers(chunk) or headers
+                    used = _usage(chunk.message) or used
+                    yield chunk
+            except Exception as e:
+                self.limiter.settle(self.key, estimate, used or 0, headers)
+                if started or attempt == RATE_LIMIT_MAX_RETRIES or not is_retryable(e):
+                    raise
+                await asyncio.sleep(self.limiter.backoff(self.key, e, attempt))
+                continue
+            self.limiter.settle(self.key, estimate, used, headers)
+            return
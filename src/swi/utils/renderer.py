@@ -0,0 +1,198 @@
+import threading
+from collections import OrderedDict
+
+from rich.console import Console, Group
+from rich.live import Live
+from rich.panel import Panel
+from rich.text import Text
+
+from swi.utils.config import RENDER_FPS, RENDER_LIVE_LINES, RENDER_PREVIEW_LINES, RENDER_KEEP_COLLAPSED
+
+STYLES = {
+    "assistant": "cyan",
+    "events": "magenta",
+    "tool": "white",
+    "summary": "dim",
+}
+
+
+class Block:
+    """
+    Text of one streamed item (assistant reply, run of tool events, tool result).
+
+    Chunks are only appended; joining happens once when the block is printed,
+    and the live view reads a bounded tail, so a frame costs the same for the
+    10th and the 100,000th token.
+    """
+
+    def __init__(self, kind: str, title: str = "", key=None):
+        self.kind = kind
+        self.title = title
+        self.key = key
+        self.parts: list[str] = []
+        self.size = 0
+        self.lines = 0
+        self.lock = threading.Lock()
+
+    def append(self, text: str):
+        with self.lock:
+            self.parts.append(text)
+            self.size += len(text)
+            self.lines += text.count("\n")
+
+    def text(self) -> str:
+        with self.lock:
+            if len(self.parts) > 1:
+                self.parts = ["".join(self.parts)]
+            return self.parts[0] if self.parts else ""
+
+    def tail(self, lines: int, width: int) -> str:
+        """Last `lines` lines, reading at most lines * width characters from the end."""
+        budget = lines * max(width, 20)
+        picked, size = [], 0
+        with self.lock:
+            for part in reversed(self.parts):
+                picked.append(part[-(budget - size):])
+                size += len(picked[-1])
+                if size >= budget:
+                    break
+        return "\n".join("".join(reversed(picked)).splitlines()[-lines:])
+
+
+class StreamRenderer:
+    """
+    Terminal view of a graph run: `feed` the (mode, payload) pairs of
+    `graph.astream(stream_mode=["messages", "custom"])` inside `with renderer:`.
+
+    Incoming chunks only go into a buffer. A Rich Live region redraws the tail
+    of the block being streamed at most RENDER_FPS times per second, and each
+    finished block is printed once above it. Tool results, event runs and
+    context summaries longer than RENDER_PREVIEW_LINES are collapsed to their
+    first and last lines; `expand(n)` opens the full text in a pager.
+    """
+
+    def __init__(
+        self,
+        console: Console,
+        fps: int = RENDER_FPS,
+        live_lines: int = RENDER_LIVE_LINES,
+        preview_lines: int = RENDER_PREVIEW_LINES,
+    ):
+        self.console = console
+        self.fps = fps
+        self.live_lines = live_lines
+        self.preview_lines = preview_lines
+        self.current: Block = None
+        self.live: Live = None
+        self.collapsed: OrderedDict[int, Block] = OrderedDict()
+        self._next_id = 1
+
+    def __enter__(self):
+        self.live = Live(
+            get_renderable=self._frame,
+            console=self.console,
+            refresh_per_second=self.fps,
+            transient=True,
+            redirect_stdout=False,
+            redirect_stderr=False,
+        )
+        self.live.start()
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self._commit()
+        finally:
+            self.live.stop()
+            self.live = None
+
+    # -------------------------------
+    # Input
+    # -------------------------------
+    def feed(self, mode: str, payload):
+        if mode == "messages":
+            message, metadata = payload
+            self.message(message, metadata or {})
+        else:
+            self.event(str(payload))
+
+    def message(self, message, metadata: dict):
+        node = metadata.get("langgraph_node")
+        text = message.text() if callable(getattr(message, "text", None)) else str(message.content)
+        if message.type == "tool":
+            self._commit()
+            self._start("tool", getattr(message, "name", None) or "tool result")
+            self.current.append(text)
+            self._commit()
+        elif node == "compress_context":
+            self._switch("summary", "context summary", key=message.id)
+            self.current.append(text)
+        elif text:
+            self._switch("assistant", key=message.id)
+            self.current.append(text)
+
+    def event(self, text: str):
+        self._switch("events")
+        self.current.append(text + "\n")
+
+    # -------------------------------
+    # Blocks
+    # -------------------------------
+    def _start(self, kind: str, title: str = "", key=None):
+        self.current = Block(kind, title, key)
+
+    def _switch(self, kind: str, title: str = "", key=None):
+        if self.current is None or self.current.kind != kind or self.current.key != key:
+            self._commit()
+            self._start(kind, title, key)
+
+    def _commit(self):
+        """Print the finished block above the live region, collapsed if it is long."""
+        block, self.current = self.current, None
+        if block is None or not block.size:
+            return
+        text = block.text().rstrip("\n")
+        lines = text.splitlines()
+        style = STYLES[block.kind]
+        if block.kind == "assistant" or len(lines) <= self.preview_lines:
+            self.console.print(Text(text, style=style))
+            return
+        block_id = self._next_id
+        self._next_id += 1
+        self.collapsed[block_id] = block
+        while len(self.collapsed) > RENDER_KEEP_COLLAPSED:
+            self.collapsed.popitem(last=False)
+        half = max(1, self.preview_lines // 2)
+        width = max(20, self.console.width - 4)
+        preview = [line[:width] for line in lines[:half]]
+        preview.append(f"… {len(lines) - 2 * half:,} more lines …")
+        preview.extend(line[:width] for line in lines[-half:])
+        self.console.print(Panel(
+            Text("\n".join(preview), style=style),
+            title=f"{block.title or block.kind} · {len(lines):,} lines, {block.size:,} chars",
+            subtitle=f"/expand {block_id}",
+            title_align="left",
+            subtitle_align="right",
+            border_style="dim",
+        ))
+
+    def _frame(self):
+        block = self.current
+        if block is None or not block.size:
+            return Text("")
+        tail = Text(block.tail(self.live_lines, self.console.width), style=STYLES[block.kind])
+        if block.lines > self.live_lines:
+            return Group(Text(f"… {block.lines - self.live_lines:,} lines above", style="dim"), tail)
+        return tail
+
+    # -------------------------------
+    # Collapsed output
+    # -------------------------------
+    def expand(self, block_id: int) -> bool:
+        """Show a collapsed block in full in the system pager."""
+        block = self.collapsed.get(block_id)
+        if block is None:
+            return False
+        with self.console.pager(styles=True):
+            self.console.print(Text(block.text(), style=STYLES[block.kind]))
+        return True
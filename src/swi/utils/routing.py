@@ -0,0 +1,290 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any
+
+from langchain_core.language_models import BaseChatModel
+
+from swi.utils.config import (
+    CACHE_DIR,
+    ROUTING_STATS,
+    ROUTING_WINDOW,
+    ROUTING_MIN_SAMPLES,
+    ROUTING_HEDGE_QUANTILE,
+    ROUTING_HEDGE_MIN_DELAY,
+    ROUTING_HEDGE_DEFAULT_DELAY,
+    ROUTING_MAX_ERROR_RATE,
+    ROUTING_COOLDOWN,
+)
+from swi.utils.tracing import tracer
+from swi.utils.wrappers import ChatModelWrapper
+
+# Latency kinds: time to the first streamed chunk, and time to a whole (non streamed) response
+FIRST = "first"
+TOTAL = "total"
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class BackendStats:
+    """Recent latencies and outcomes of one provider."""
+
+    def __init__(self, window: int = ROUTING_WINDOW):
+        self.latency = {FIRST: deque(maxlen=window), TOTAL: deque(maxlen=window)}
+        self.outcomes = deque(maxlen=window)  # True for success
+        self.last_failure = 0.0
+
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def healthy(self) -> bool:
+        # A failing provider is skipped for ROUTING_COOLDOWN, then gets another chance
+        if self.error_rate() <= ROUTING_MAX_ERROR_RATE:
+            return True
+        return time.time() - self.last_failure > ROUTING_COOLDOWN
+
+    def to_dict(self) -> dict:
+        return {
+            FIRST: list(self.latency[FIRST]),
+            TOTAL: list(self.latency[TOTAL]),
+            "outcomes": list(self.outcomes),
+            "last_failure": self.last_failure,
+        }
+
+
+class RouteStats:
+    """
+    Per provider statistics shared by every routed model in the process.
+
+    Kept in `.swi/routing.json` so a new session starts from the latencies
+    observed in the previous ones instead of guessing.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(CACHE_DIR, ROUTING_STATS)
+        self.lock = threading.Lock()
+        self.backends: dict[str, BackendStats] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+        for name, data in saved.items():
+            stats = self.get(name)
+            stats.latency[FIRST].extend(data.get(FIRST, []))
+            stats.latency[TOTAL].extend(data.get(TOTAL, []))
+            stats.outcomes.extend(data.get("outcomes", []))
+            stats.last_failure = data.get("last_failure", 0.0)
+
+    def get(self, name: str) -> BackendStats:
+        if name not in self.backends:
+            self.backends[name] = BackendStats()
+        return self.backends[name]
+
+    def success(self, name: str, kind: str, seconds: float):
+        with self.lock:
+            stats = self.get(name)
+            stats.latency[kind].append(round(seconds, 4))
+            stats.outcomes.append(True)
+            self._save()
+
+    def censored(self, name: str, kind: str, seconds: float):
+        """
+        A request cancelled after `seconds` because another provider answered first.
+
+        Its real latency is at least `seconds`; recording that lower bound lets a
+        provider that became slow lose its fast median instead of being tried
+        first (and hedged) on every request.
+        """
+        with self.lock:
+            self.get(name).latency[kind].append(round(seconds, 4))
+            self._save()
+
+    def failure(self, name: str):
+        with self.lock:
+            stats = self.get(name)
+            stats.outcomes.append(False)
+            stats.last_failure = time.time()
+            self._save()
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({name: stats.to_dict() for name, stats in self.backends.items()}, f)
+        except OSError:
+            pass
+
+    def rank(self, names: list[str], kind: str) -> list[str]:
+        """Healthy providers first, fastest median first. Providers with few samples are tried early."""
+        def score(name):
+            stats = self.get(name)
+            samples = stats.latency[kind]
+            median = percentile(samples, 0.5) if len(samples) >= ROUTING_MIN_SAMPLES else 0.0
+            return (not stats.healthy(), median)
+        # sorted is stable, so ties keep the configured order (detected provider first)
+        return sorted(names, key=score)
+
+    def hedge_delay(self, name: str, kind: str) -> float:
+        samples = self.get(name).latency[kind]
+        if len(samples) < ROUTING_MIN_SAMPLES:
+            return ROUTING_HEDGE_DEFAULT_DELAY
+        return max(ROUTING_HEDGE_MIN_DELAY, percentile(samples, ROUTING_HEDGE_QUANTILE))
+
+
+async def _cancel(task: asyncio.Task, stream=None):
+    task.cancel()
+    try:
+        await task
+    except BaseException:
+        pass
+    if stream is not None:
+        await stream.aclose()
+
+
+class RoutingChatModel(ChatModelWrapper):
+    """
+    Sends each request to the fastest healthy provider and hedges slow ones.
+
+    `inner` is the detected provider, `backends` every provider that can serve
+    the request (including `inner`). When hedging is on and the chosen provider
+    has not produced its first chunk after its p95 latency, the same request is
+    started on the next provider; the first to answer wins and the other is
+    cancelled, its elapsed time kept as a latency sample. A provider failing
+    before its first chunk falls over to the next.
+
+    Provider specific request kwargs (e.g. the OpenAI prompt cache key) are passed
+    as `backend_kwargs={name: {...}}` and only reach that provider.
+    """
+
+    backends: dict[str, BaseChatModel]
+    hedge: bool = True
+    stats: Any = None
+
+    def model_post_init(self, __context):
+        if self.stats is None:
+            self.stats = get_route_stats()
+
+    def _call_kwargs(self, name: str, kwargs: dict) -> dict:
+        backend_kwargs = kwargs.get("backend_kwargs") or {}
+        call_kwargs = {k: v for k, v in kwargs.items() if k != "backend_kwargs"}
+        return {**call_kwargs, **backend_kwargs.get(name, {})}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        # Sync path: failover only, hedging needs the event loop
+        error = None
+        for name in self.stats.rank(list(self.backends), TOTAL):
+            start = time.perf_counter()
+            try:
+                result = self.backends[name]._generate(messages, stop=stop, **self._call_kwargs(name, kwargs))
+            except Exception as e:
+                self.stats.failure(name)
+                error = e
+                continue
+            self.stats.success(name, TOTAL, time.perf_counter() - start)
+            return result
+        raise error
+
+    async def _race(self, kind: str, start_call):
+        """
+        Run `start_call(name) -> (awaitable, stream)` on providers in rank order.
+
+        Returns (name, result, stream, started) of the first success, where
+        `result` is the first chunk of a stream or the whole response.
+        """
+        order = iter(self.stats.rank(list(self.backends), kind))
+        pending: dict[asyncio.Task, tuple] = {}
+        hedged = False
+        error = None
+        won = None
+
+        def launch() -> bool:
+            name = next(order, None)
+            if name is None:
+                return False
+            awaitable, stream = start_call(name)
+            pending[asyncio.ensure_future(awaitable)] = (name, stream, time.perf_counter())
+            return True
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if self.hedge and not hedged and len(pending) == 1:
+                    name, _, started = next(iter(pending.values()))
+                    timeout = max(0.0, self.stats.hedge_delay(name, kind) - (time.perf_counter() - started))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch()
+                    hedged = True
+                    continue
+                for task in done:
+                    name, stream, started = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except StopAsyncIteration:
+                        result = None
+                    except Exception as e:
+                        self.stats.failure(name)
+                        error = e
+                        continue
+                    tracer.current().set(backend=name, hedged=hedged)
+                    won = started
+                    return name, result, stream, started
+                # Everything launched so far failed
+                if not pending and not launch():
+                    break
+        finally:
+            now = time.perf_counter()
+            for task, (name, stream, started) in pending.items():
+                await _cancel(task, stream)
+                # A loser started before the winner was slower than it; a hedge
+                # started later tells nothing about its own latency
+                if won is not None and started < won:
+                    self.stats.censored(name, kind, now - started)
+        raise error
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        def start_call(name):
+            call_kwargs = self._call_kwargs(name, kwargs)
+            return self.backends[name]._agenerate(messages, stop=stop, **call_kwargs), None
+
+        name, result, _, started = await self._race(TOTAL, start_call)
+        self.stats.success(name, TOTAL, time.perf_counter() - started)
+        return result
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        def start_call(name):
+            stream = self.backends[name]._astream(messages, stop=stop, **self._call_kwargs(name, kwargs))
+            return anext(stream), stream
+
+        name, first, stream, started = await self._race(FIRST, start_call)
+        self.stats.success(name, FIRST, time.perf_counter() - started)
+        if first is None:
+            return
+        yield first
+        try:
+            async for chunk in stream:
+                yield chunk
+        except Exception:
+            self.stats.failure(name)
+            raise
+
+
+_stats: dict[str, RouteStats] = {}
+
+
+def get_route_stats(path: str = None) -> RouteStats:
+    """Return the process wide RouteStats for a stats file."""
+    abs_path = os.path.abspath(path or os.path.join(CACHE_DIR, ROUTING_STATS))
+    if abs_path not in _stats:
+        _stats[abs_path] = RouteStats(abs_path)
+    return _stats[abs_path]
@@ -0,0 +1,42 @@
+import time
+import importlib
+from contextlib import contextmanager
+
+# (label, seconds) in the order they happened
+_timings: list[tuple[str, float]] = []
+_started = time.perf_counter()
+
+
+def timed_import(module: str):
+    """Import a module and record how long it took.
+
+    Modules already imported by an earlier step cost nothing here, so the
+    recorded times add up to the real startup cost.
+    """
+    start = time.perf_counter()
+    mod = importlib.import_module(module)
+    _timings.append((f"import {module}", time.perf_counter() - start))
+    return mod
+
+
+@contextmanager
+def timed(label: str):
+    """Record the duration of a startup step."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _timings.append((label, time.perf_counter() - start))
+
+
+def report(console):
+    """Print the startup breakdown as a table."""
+    from rich.table import Table
+
+    table = Table(title="Startup time", show_header=True, header_style="bold magenta")
+    table.add_column("Step", justify="left")
+    table.add_column("ms", justify="right")
+    for label, seconds in _timings:
+        table.add_row(label, f"{seconds * 1000:.1f}")
+    table.add_row("[bold]since swi.utils.startup import[/bold]", f"{(time.perf_counter() - _started) * 1000:.1f}")
+    console.print(table)
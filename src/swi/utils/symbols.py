@@ -0,0 +1,212 @@
+import os
+import ast
+import json
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+
+from swi.utils.config import CACHE_DIR, SYMBOL_DB, SYMBOL_CACHE_ENTRIES
+from swi.utils.file_cache import file_cache
+
+INDEX_VERSION = 1
+
+
+@dataclass
+class Symbol:
+    name: str
+    kind: str  # class, function, method, variable
+    qualname: str
+    signature: str
+    start_line: int
+    end_line: int
+    depth: int = 0
+
+
+@dataclass
+class FileSymbols:
+    symbols: list[Symbol]
+    # name -> line numbers where it is used (loads, attribute accesses, calls)
+    references: dict[str, list[int]]
+    error: str = None
+
+
+# -------------------------------
+# Language parsers
+# -------------------------------
+def _python_signature(node) -> str:
+    if isinstance(node, ast.ClassDef):
+        bases = [ast.unparse(base) for base in node.bases] + [ast.unparse(kw) for kw in node.keywords]
+        return f"class {node.name}({', '.join(bases)})" if bases else f"class {node.name}"
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"
+
+
+def parse_python(text: str) -> FileSymbols:
+    """Definitions (classes, functions, methods, module variables) and name references of a Python file."""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError) as e:
+        return FileSymbols([], {}, error=f"{type(e).__name__}: {e}")
+
+    symbols = []
+
+    def visit(body, parents: list[str], in_class: bool):
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                is_class = isinstance(node, ast.ClassDef)
+                kind = "class" if is_class else "method" if in_class else "function"
+                # Decorators belong to the definition when reading its range
+                start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                symbols.append(Symbol(
+                    name=node.name,
+                    kind=kind,
+                    qualname=".".join(parents + [node.name]),
+                    signature=_python_signature(node),
+                    start_line=start,
+                    end_line=node.end_lineno,
+                    depth=len(parents),
+                ))
+                visit(node.body, parents + [node.name], is_class)
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)) and (not parents or in_class):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        symbols.append(Symbol(
+                            name=target.id,
+                            kind="variable",
+                            qualname=".".join(parents + [target.id]),
+                            signature=ast.unparse(node).split("\n")[0][:120],
+                            start_line=node.lineno,
+                            end_line=node.end_lineno,
+                            depth=len(parents),
+                        ))
+            elif isinstance(node, (ast.If, ast.Try, ast.With)) and not parents:
+                # Definitions guarded by `if TYPE_CHECKING:`, try/except imports, ...
+                for block in ("body", "orelse", "finalbody"):
+                    visit(getattr(node, block, []), parents, in_class)
+                for handler in getattr(node, "handlers", []):
+                    visit(handler.body, parents, in_class)
+
+    visit(tree.body, [], False)
+
+    references: dict[str, set] = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+            references.setdefault(node.id, set()).add(node.lineno)
+        elif isinstance(node, ast.Attribute):
+            references.setdefault(node.attr, set()).add(node.lineno)
+    return FileSymbols(symbols, {name: sorted(lines) for name, lines in references.items()})
+
+
+# File extension -> parser(text) -> FileSymbols. Other languages plug in here.
+PARSERS = {
+    ".py": parse_python,
+    ".pyi": parse_python,
+}
+
+
+def register_parser(extensions: list[str], parser):
+    """Add a parser for more file types, e.g. a tree-sitter based one."""
+    for extension in extensions:
+        PARSERS[extension] = parser
+
+
+# -------------------------------
+# Index
+# -------------------------------
+class SymbolIndex:
+    """
+    Symbols per file, cached by content hash.
+
+    Parsed results live in a small in-memory LRU and in `.swi/symbols.sqlite`,
+    so an unchanged file is never parsed twice, even across sessions. File
+    bytes come from the shared file cache, which re-reads changed files.
+    """
+
+    def __init__(self, root: str = "./", path: str = None, max_entries: int = SYMBOL_CACHE_ENTRIES):
+        self.root = os.path.abspath(root)
+        self.path = path or os.path.join(self.root, CACHE_DIR, SYMBOL_DB)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS symbols (hash TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self._memory: OrderedDict[str, FileSymbols] = OrderedDict()
+
+    @staticmethod
+    def supports(path: str) -> bool:
+        return os.path.splitext(path)[1] in PARSERS
+
+    def _remember(self, digest: str, symbols: FileSymbols):
+        self._memory[digest] = symbols
+        self._memory.move_to_end(digest)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def file_symbols(self, path: str) -> FileSymbols:
+        """Parse (or fetch from cache) the symbols of one file."""
+        parser = PARSERS.get(os.path.splitext(path)[1])
+        if parser is None:
+            return FileSymbols([], {}, error=f"No symbol parser for {os.path.splitext(path)[1] or 'this file type'}")
+        data = file_cache.read_bytes(path)
+        digest = hashlib.sha1(b"%d\0" % INDEX_VERSION + parser.__name__.encode() + b"\0" + data).hexdigest()
+
+        with self.lock:
+            if digest in self._memory:
+                self._memory.move_to_end(digest)
+                return self._memory[digest]
+            row = self.conn.execute("SELECT data FROM symbols WHERE hash = ?", (digest,)).fetchone()
+        if row is not None:
+            raw = json.loads(row[0])
+            symbols = FileSymbols([Symbol(**s) for s in raw["symbols"]], raw["references"], raw.get("error"))
+        else:
+            symbols = parser(data.decode("utf-8", "replace"))
+            payload = {"symbols": [asdict(s) for s in symbols.symbols], "references": symbols.references, "error": symbols.error}
+            with self.lock, self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO symbols (hash, data) VALUES (?, ?)", (digest, json.dumps(payload)))
+        with self.lock:
+            self._remember(digest, symbols)
+        return symbols
+
+    def definitions(self, name: str, paths) -> list[tuple[str, Symbol]]:
+        """Definitions matching `name` (plain or dotted qualname suffix) in the given files."""
+        found = []
+        for path in paths:
+            if not self.supports(path):
+                continue
+            try:
+                symbols = self.file_symbols(path)
+            except OSError:
+                continue
+            for symbol in symbols.symbols:
+                if symbol.name == name or symbol.qualname == name or symbol.qualname.endswith("." + name):
+                    found.append((path, symbol))
+        return found
+
+    def references(self, name: str, paths) -> list[tuple[str, int]]:
+        """(path, line) of every use of the last part of `name` in the given files."""
+        short = name.rsplit(".", 1)[-1]
+        found = []
+        for path in paths:
+            if not self.supports(path):
+                continue
+            try:
+                lines = self.file_symbols(path).references.get(short, [])
+            except OSError:
+                continue
+            found.extend((path, line) for line in lines)
+        return found
+
+
+_indexes: dict[str, SymbolIndex] = {}
+
+
+def get_symbol_index(root: str = "./") -> SymbolIndex:
+    """Return the process wide SymbolIndex for a root folder."""
+    abs_root = os.path.abspath(root)
+    if abs_root not in _indexes:
+        _indexes[abs_root] = SymbolIndex(abs_root)
+    return _indexes[abs_root]
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import functools
+import contextvars
+from contextlib import contextmanager
+
+from swi.utils.config import CACHE_DIR, TRACE_DIR
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def rss_bytes() -> int:
+    """Resident set size of this process, or the peak RSS where the current one is unknown."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+class Span:
+    """One timed operation. Attributes can be added until the span ends."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: str = None, attributes: dict = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Returned while tracing is off so callers never need to check."""
+
+    def set(self, **attributes):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+_current: contextvars.ContextVar = contextvars.ContextVar("swi_span", default=None)
+
+
+class Tracer:
+    """
+    Lightweight span recorder for graph nodes, model calls and tools.
+
+    Disabled by default, so an instrumented call costs one attribute check.
+    Once enabled, every finished span is appended to `.swi/traces/<session>.jsonl`
+    and `export_otlp` writes the whole session as OTLP/JSON, which can be posted
+    to an OpenTelemetry collector or loaded by trace viewers.
+    """
+
+    def __init__(self, folder: str = None):
+        self.folder = folder or os.path.join(CACHE_DIR, TRACE_DIR)
+        self.enabled = False
+        self.session = None
+        self.trace_id = None
+        self.spans: list[Span] = []
+
+    def enable(self, session: str = None, folder: str = None):
+        """Start a new session, dropping spans recorded by a previous one."""
+        self.folder = folder or self.folder
+        self.session = session or time.strftime("%Y%m%d-%H%M%S")
+        self.trace_id = os.urandom(16).hex()
+        self.spans = []
+        self.enabled = True
+        os.makedirs(self.folder, exist_ok=True)
+
+    @property
+    def jsonl_path(self) -> str:
+        return os.path.join(self.folder, f"{self.session}.jsonl")
+
+    @property
+    def otlp_path(self) -> str:
+        return os.path.join(self.folder, f"{self.session}.otlp.json")
+
+    # -------------------------------
+    # Recording
+    # -------------------------------
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time the block as a child of the current span."""
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+        parent = _current.get()
+        span = Span(name, self.trace_id, parent.span_id if parent else None, attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            _current.reset(token)
+            span.end_ns = time.time_ns()
+            span.attributes["process.rss_bytes"] = rss_bytes()
+            self._record(span)
+
+    def traced(self, name: str):
+        """Decorator wrapping an async callable (e.g. a graph node) in a span."""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def current(self):
+        return _current.get() or NOOP_SPAN
+
+    def _record(self, span: Span):
+        self.spans.append(span)
+        try:
+            with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+        except OSError:
+            pass
+
+    # -------------------------------
+    # Export
+    # -------------------------------
+    @staticmethod
+    def _otlp_value(value) -> dict:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    def export_otlp(self) -> str:
+        """Write the recorded spans as an OTLP/JSON ExportTraceServiceRequest."""
+        spans = []
+        for span in self.spans:
+            spans.append({
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "parentSpanId": span.parent_id or "",
+                "name": span.name,
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [{"key": k, "value": self._otlp_value(v)} for k, v in span.attributes.items()],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            })
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": "swi"}},
+                    {"key": "session.id", "value": {"stringValue": self.session}},
+                ]},
+                "scopeSpans": [{"scope": {"name": "swi.utils.tracing"}, "spans": spans}],
+            }]
+        }
+        with open(self.otlp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        return self.otlp_path
+
+    def summary(self) -> list[tuple]:
+        """Per span name: (name, count, total ms, mean ms, max ms), slowest first."""
+        groups: dict[str, list[float]] = {}
+        for span in self.spans:
+            groups.setdefault(span.name, []).append(span.duration_ms)
+        rows = [
+            (name, len(times), sum(times), sum(times) / len(times), max(times))
+            for name, times in groups.items()
+        ]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def report(self, console):
+        """Print the span summary and the export locations."""
+        from rich.table import Table
+
+        table = Table(title="Profile", show_header=True, header_style="bold magenta")
+        for column in ("Span", "Count", "Total ms", "Mean ms", "Max ms"):
+            table.add_column(column, justify="left" if column == "Span" else "right")
+        for name, count, total, mean, longest in self.summary():
+            table.add_row(name, str(count), f"{total:.1f}", f"{mean:.1f}", f"{longest:.1f}")
+        console.print(table)
+        console.print(f"[dim]RSS {rss_bytes() / 2**20:.1f} MiB. Spans: {self.jsonl_path}, OTLP: {self.export_otlp()}[/dim]")
+
+
+tracer = Tracer()
@@ -0,0 +1,278 @@
+import os
+import json
+import time
+
+from swi.utils.config import (
+    CACHE_DIR,
+    IGNORE_DIRS,
+    TREE_INDEX_FILE,
+    TREE_REFRESH_INTERVAL,
+    TREE_MAX_DEPTH,
+    TREE_MAX_ENTRIES,
+    TREE_MAX_BYTES,
+    TREE_SUMMARIZE_OVER,
+    TREE_COUNT_LIMIT,
+)
+from swi.utils.helper import GitIgnore, count_files
+
+INDEX_VERSION = 2
+
+
+class TreeIndex:
+    """
+    Persistent snapshot of the project tree.
+
+    The index keeps one entry per directory (its mtime and sorted children).
+    A refresh stats every directory (plus an islink check per subfolder and a
+    stat per .gitignore) and re-lists only the ones whose mtime changed, so
+    repeat turns skip the listing and .gitignore matching of unchanged folders.
+    Ignored folders (node_modules, .git, ...) are not expanded; the index keeps
+    their file count, recounted only when the folder's own mtime changes.
+    The snapshot is stored under CACHE_DIR and reused between sessions.
+    """
+
+    def __init__(self, root: str = "./", ignore_dirs=None, cache_path: str = None):
+        self.root = os.path.abspath(root)
+        self.ignore_dirs = IGNORE_DIRS if ignore_dirs is None else set(ignore_dirs)
+        self.cache_path = cache_path or os.path.join(self.root, CACHE_DIR, TREE_INDEX_FILE)
+        # relative dir path -> {"mtime": int, "entries": [[name, is_dir], ...] or None}
+        self.dirs: dict[str, dict] = {}
+        # relative path of an ignored folder -> [mtime, file count]
+        self.counts: dict[str, list] = {}
+        # relative dir path -> mtime of its .gitignore
+        self.ignores: dict[str, int] = {}
+        self.gitignore = GitIgnore(self.root)
+        self._last_refresh = 0.0
+        self._rendered: dict[tuple, str] = {}
+        self._load()
+
+    # -------------------------------
+    # Persistence
+    # -------------------------------
+    def _load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION and data.get("root") == self.root:
+            self.dirs = data.get("dirs", {})
+            self.counts = data.get("counts", {})
+            self.ignores = data.get("ignores", {})
+
+    def save(self):
+        """Atomically write the index to disk. Failures are not fatal."""
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                data = {"dirs": self.dirs, "counts": self.counts, "ignores": self.ignores}
+                json.dump({"version": INDEX_VERSION, "root": self.root, **data}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+    # -------------------------------
+    # Change detection
+    # -------------------------------
+    def _scan(self, abs_path: str, mtime: int) -> dict:
+        try:
+            with os.scandir(abs_path) as it:
+                entries = [[entry.name, entry.is_dir()] for entry in it]
+        except PermissionError:
+            return {"mtime": mtime, "entries": None}
+        entries.sort(key=lambda e: e[0])
+        return {"mtime": mtime, "entries": entries}
+
+    def _visible(self, rel_path: str, entries) -> list:
+        """Drop .gitignore matches from a folder listing. Ignored folders are kept, they render as a count."""
+        visible = []
+        for name, is_dir in entries or []:
+            if is_dir and name in self.ignore_dirs:
+                visible.append((name, is_dir))
+                continue
+            child = os.path.join(rel_path, name) if rel_path else name
+            if self.gitignore.is_ignored(child, is_dir):
+                continue
+            visible.append((name, is_dir))
+        return visible
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Bring the index up to date with the file system.
+
+        Returns True if anything changed since the previous snapshot.
+        """
+        now = time.monotonic()
+        if not force and self.dirs and now - self._last_refresh < TREE_REFRESH_INTERVAL:
+            return False
+        self._last_refresh = now
+
+        changed = False
+        seen = set()
+        counted = set()
+        stack = [""]
+        while stack:
+            rel_path = stack.pop()
+            abs_path = os.path.join(self.root, rel_path) if rel_path else self.root
+            try:
+                mtime = os.stat(abs_path).st_mtime_ns
+            except OSError:
+                continue
+            seen.add(rel_path)
+
+            cached = self.dirs.get(rel_path)
+            if cached is None or cached["mtime"] != mtime:
+                cached = self._scan(abs_path, mtime)
+                self.dirs[rel_path] = cached
+                changed = True
+
+            # A .gitignore edited in place leaves the folder mtime alone, so it is
+            # checked on its own. Its rules only apply below this folder, whose
+            # children are not pushed yet: reloading here keeps the walk exact.
+            if self._gitignore_changed(rel_path, abs_path, cached["entries"]):
+                self.gitignore.reload(rel_path)
+                changed = True
+
+            for name, is_dir in cached["entries"] or []:
+                if not is_dir:
+                    continue
+                child = os.path.join(rel_path, name) if rel_path else name
+                if name in self.ignore_dirs:
+                    changed = self._count(child) or changed
+                    counted.add(child)
+                    continue
+                if self.gitignore.is_ignored(child, True):
+                    continue
+                # Do not follow symlinked folders, they can loop back into the tree
+                if os.path.islink(os.path.join(abs_path, name)):
+                    continue
+                stack.append(child)
+
+        stale = set(self.dirs) - seen
+        for rel_path in stale:
+            del self.dirs[rel_path]
+        stale_counts = set(self.counts) - counted
+        for rel_path in stale_counts:
+            del self.counts[rel_path]
+        for rel_path in set(self.ignores) - seen:
+            del self.ignores[rel_path]
+        changed = changed or bool(stale) or bool(stale_counts)
+
+        if changed:
+            self._rendered.clear()
+            self.save()
+        return changed
+
+    def _gitignore_changed(self, rel_path: str, abs_path: str, entries) -> bool:
+        """Track the mtime of a folder's .gitignore. Returns True if it was added, edited or removed."""
+        mtime = None
+        if any(name == ".gitignore" and not is_dir for name, is_dir in entries or []):
+            try:
+                mtime = os.stat(os.path.join(abs_path, ".gitignore")).st_mtime_ns
+            except OSError:
+                pass
+        if self.ignores.get(rel_path) == mtime:
+            return False
+        if mtime is None:
+            del self.ignores[rel_path]
+        else:
+            self.ignores[rel_path] = mtime
+        return True
+
+    def _count(self, rel_path: str) -> bool:
+        """Recount the files of an ignored folder if its mtime changed. Returns True if the count differs."""
+        abs_path = os.path.join(self.root, rel_path)
+        try:
+            mtime = os.stat(abs_path).st_mtime_ns
+        except OSError:
+            return False
+        cached = self.counts.get(rel_path)
+        if cached is not None and cached[0] == mtime:
+            return False
+        count = count_files(abs_path, TREE_COUNT_LIMIT)
+        self.counts[rel_path] = [mtime, count]
+        # Saving the index touches CACHE_DIR itself: only a new count is a change
+        return cached is None or cached[1] != count
+
+    # -------------------------------
+    # Rendering
+    # -------------------------------
+    def render(
+        self,
+        max_depth: int = TREE_MAX_DEPTH,
+        max_entries: int = TREE_MAX_ENTRIES,
+        max_bytes: int = TREE_MAX_BYTES,
+    ) -> str:
+        """Render the cached tree with depth, entry and size budgets."""
+        key = (max_depth, max_entries, max_bytes)
+        if key in self._rendered:
+            return self._rendered[key]
+
+        lines = []
+        budget = [max_entries, max_bytes]
+
+        def emit(line: str):
+            lines.append(line)
+            budget[0] -= 1
+            budget[1] -= len(line.encode()) + 1
+
+        def walk(rel_path: str, prefix: str, depth: int):
+            node = self.dirs.get(rel_path)
+            if node is None:
+                return
+            if node["entries"] is None:
+                lines.append(prefix + "🚫 [Permission Denied]")
+                return
+            entries = self._visible(rel_path, node["entries"])
+            for index, (name, is_dir) in enumerate(entries):
+                if budget[0] <= 0:
+                    lines.append(prefix + f"└── … {len(entries) - index} more entries")
+                    return
+                if budget[1] <= 0:
+                    lines.append(prefix + "└── … truncated (size limit reached)")
+                    return
+                last = index == len(entries) - 1
+                connector = "└── " if last else "├── "
+                child = os.path.join(rel_path, name) if rel_path else name
+                if not is_dir:
+                    emit(prefix + connector + name)
+                    continue
+                if name in self.ignore_dirs:
+                    count = self.counts.get(child, [0, 0])[1]
+                    more = "+" if count >= TREE_COUNT_LIMIT else ""
+                    emit(prefix + connector + f"{name}/ ({count:,}{more} files)")
+                    continue
+                child_node = self.dirs.get(child)
+                size = len(child_node["entries"] or []) if child_node else 0
+                if size and (depth + 1 >= max_depth or size > TREE_SUMMARIZE_OVER):
+                    emit(prefix + connector + f"{name}/ ({size:,} entries)")
+                    continue
+                emit(prefix + connector + name + "/")
+                walk(child, prefix + ("    " if last else "│   "), depth + 1)
+
+        walk("", "", 0)
+        rendered = "\n".join(lines) + "\n" if lines else ""
+        self._rendered[key] = rendered
+        return rendered
+
+    def snapshot(
+        self,
+        max_depth: int = TREE_MAX_DEPTH,
+        max_entries: int = TREE_MAX_ENTRIES,
+        max_bytes: int = TREE_MAX_BYTES,
+    ) -> str:
+        """Refresh (if due) and return the rendered tree."""
+        self.refresh()
+        return self.render(max_depth=max_depth, max_entries=max_entries, max_bytes=max_bytes)
+
+
+_indexes: dict[str, TreeIndex] = {}
+
+
+def get_tree_index(root: str = "./") -> TreeIndex:
+    """Return the process wide TreeIndex for a root folder."""
+    abs_root = os.path.abspath(root)
+    if abs_root not in _indexes:
+        _indexes[abs_root] = TreeIndex(abs_root)
+    return _indexes[abs_root]
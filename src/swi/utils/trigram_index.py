@@ -0,0 +1,365 @@
+import os
+import re
+import time
+import zlib
+import sqlite3
+import threading
+from array import array
+from itertools import accumulate
+
+from swi.utils.config import (
+    CACHE_DIR,
+    SEARCH_INDEX_DB,
+    SEARCH_REFRESH_INTERVAL,
+    SEARCH_MAX_FILE_BYTES,
+    SEARCH_INDEX_MAX_POSTINGS,
+    SEARCH_LOW_VALUE_DIRS,
+    SEARCH_LOW_VALUE_SUFFIXES,
+)
+from swi.utils.helper import iter_project_files, read_text_file
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+SCHEMA = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    grams BLOB,  -- packed trigrams of the file, NULL when left out of the index
+    grams_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS postings (
+    trigram INTEGER PRIMARY KEY,
+    ids BLOB NOT NULL  -- packed ids of the files containing the trigram
+);
+"""
+
+# Pending postings kept in memory before they are merged into the database
+FLUSH_POSTINGS = 4_000_000
+
+
+def trigrams(data: bytes) -> set[int]:
+    """Distinct lowercase byte trigrams of a file or query, packed into 24 bit ints."""
+    data = data.lower()
+    return {(a << 16) | (b << 8) | c for a, b, c in zip(data, data[1:], data[2:])}
+
+
+def pack(values: list[int]) -> bytes:
+    """Sorted ints as zlib compressed deltas, one to two bytes per value for dense lists."""
+    deltas = array("I", values[:1])
+    deltas.extend(b - a for a, b in zip(values, values[1:]))
+    return zlib.compress(deltas.tobytes(), 1)
+
+
+def unpack(blob: bytes) -> list[int]:
+    deltas = array("I")
+    deltas.frombytes(zlib.decompress(blob))
+    return list(accumulate(deltas))
+
+
+def low_value(rel_path: str, data: bytes) -> bool:
+    """Vendored, generated, minified and lock files: first to go when the index is full."""
+    parts = rel_path.split("/")
+    if any(part in SEARCH_LOW_VALUE_DIRS for part in parts[:-1]) or parts[-1].endswith(SEARCH_LOW_VALUE_SUFFIXES):
+        return True
+    head = data[:1024]
+    if b"@generated" in head or b"DO NOT EDIT" in head:
+        return True
+    # Minified code: very long lines
+    return len(data) > 4096 and len(data) / (data.count(b"\n") + 1) > 300
+
+
+def _needles(literals: list[str]) -> list[bytes]:
+    """Lowercase bytes of the literals a plain scan can test (ASCII only, like the index)."""
+    return [literal.encode("utf-8").lower() for literal in literals if literal.isascii()]
+
+
+def required_literals(pattern: str, flags: int = 0) -> list[str]:
+    """
+    Literal strings every match of `pattern` must contain.
+
+    Only the top level sequence (and groups inside it) is used. Anything optional
+    or alternated ends the current literal, so the result may be empty, in which
+    case every file is a candidate.
+    """
+    literals, current = [], []
+
+    def flush():
+        if current:
+            literals.append("".join(current))
+            current.clear()
+
+    def walk(items):
+        for op, arg in items:
+            if op is sre_parse.LITERAL:
+                current.append(chr(arg))
+            elif op is sre_parse.SUBPATTERN:
+                walk(arg[-1])
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and arg[0] >= 1:
+                # x{2,} still contains one x, but what follows is not adjacent
+                flush()
+                walk(arg[2])
+                flush()
+            elif op is sre_parse.AT:
+                continue
+            else:
+                flush()
+
+    try:
+        walk(sre_parse.parse(pattern, flags))
+    except (re.error, TypeError, ValueError):
+        return []
+    flush()
+    return [literal for literal in literals if len(literal) >= 3]
+
+
+class TrigramIndex:
+    """
+    Persistent trigram index of the text files under a project root.
+
+    Each file contributes its distinct lowercase byte trigrams, and each trigram
+    keeps the ids of its files as one compressed blob of deltas (a few bytes per
+    pair instead of a row each). A query only opens the files that contain
+    every trigram of its literal parts, so a search touches a handful of files
+    instead of the whole tree. `refresh` compares (mtime, size) with the stored
+    values and re-indexes only the files that changed, it is throttled by
+    SEARCH_REFRESH_INTERVAL.
+
+    `start_refresh` runs refreshes on a background thread with its own
+    connection. Until the first refresh of the process has committed, files
+    changed since the last session could be missing, so queries scan the files
+    instead. Past SEARCH_INDEX_MAX_POSTINGS pairs, vendored, generated and
+    minified files (`low_value`) are left out of the index and of searches.
+    """
+
+    def __init__(self, root: str = "./", path: str = None):
+        self.root = os.path.abspath(root)
+        self.path = path or os.path.join(self.root, CACHE_DIR, SEARCH_INDEX_DB)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        # Refreshes write through their own connection, queries keep reading the last commit
+        self.writer: sqlite3.Connection = None
+        self.write_lock = threading.Lock()
+        self.thread: threading.Thread = None
+        self.ready = False
+        self._last_refresh = 0.0
+
+    # -------------------------------
+    # Indexing
+    # -------------------------------
+    def start_refresh(self):
+        """Refresh on a background thread, unless one is already running."""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self.refresh, kwargs={"force": True}, name="trigram-index", daemon=True)
+        self.thread.start()
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Bring the index up to date. Returns the number of files (re)indexed or removed.
+
+        Returns 0 at once while another refresh (e.g. the background build) runs.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_refresh < SEARCH_REFRESH_INTERVAL:
+            return 0
+        if not self.write_lock.acquire(blocking=False):
+            return 0
+        try:
+            if self.writer is None:
+                self.writer = sqlite3.connect(self.path, check_same_thread=False)
+            changed = self._refresh(self.writer)
+        finally:
+            self.write_lock.release()
+        self.ready = True
+        self._last_refresh = time.monotonic()
+        return changed
+
+    def _refresh(self, conn: sqlite3.Connection) -> int:
+        known = {
+            path: (file_id, mtime_ns, size)
+            for file_id, path, mtime_ns, size in conn.execute("SELECT id, path, mtime_ns, size FROM files")
+        }
+        total = conn.execute("SELECT COALESCE(SUM(grams_count), 0) FROM files").fetchone()[0]
+        # trigram -> file ids to drop / to add, merged into the blobs in batches
+        removed: dict[int, list[int]] = {}
+        added: dict[int, list[int]] = {}
+        pending = 0
+        changed = 0
+
+        def forget(file_id: int):
+            nonlocal total, pending
+            old, count = conn.execute("SELECT grams, grams_count FROM files WHERE id = ?", (file_id,)).fetchone()
+            if old is not None:
+                for gram in unpack(old):
+                    removed.setdefault(gram, []).append(file_id)
+            total -= count
+            pending += count
+
+        with conn:
+            for rel_path, st in iter_project_files(self.root, max_bytes=SEARCH_MAX_FILE_BYTES):
+                previous = known.pop(rel_path, None)
+                if previous is not None and previous[1:] == (st.st_mtime_ns, st.st_size):
+                    continue
+                if previous is not None:
+                    forget(previous[0])
+                data = read_text_file(os.path.join(self.root, rel_path)) or b""
+                grams = sorted(trigrams(data))
+                if total + len(grams) > SEARCH_INDEX_MAX_POSTINGS and low_value(rel_path, data):
+                    packed, grams = None, []
+                else:
+                    packed = pack(grams)
+                file_id = conn.execute(
+                    "INSERT INTO files (path, mtime_ns, size, grams, grams_count) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(path) DO UPDATE SET mtime_ns = excluded.mtime_ns, size = excluded.size, "
+                    "grams = excluded.grams, grams_count = excluded.grams_count RETURNING id",
+                    (rel_path, st.st_mtime_ns, st.st_size, packed, len(grams)),
+                ).fetchone()[0]
+                for gram in grams:
+                    added.setdefault(gram, []).append(file_id)
+                total += len(grams)
+                pending += len(grams)
+                changed += 1
+                if pending > FLUSH_POSTINGS:
+                    self._merge(conn, removed, added)
+                    pending = 0
+            # Whatever was not seen on disk is gone
+            for file_id, _, _ in known.values():
+                forget(file_id)
+                conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            changed += len(known)
+            self._merge(conn, removed, added)
+        return changed
+
+    @staticmethod
+    def _merge(conn: sqlite3.Connection, removed: dict, added: dict):
+        """Apply pending removals, then additions, to the postings blobs and clear them."""
+        for gram in removed.keys() | added.keys():
+            row = conn.execute("SELECT ids FROM postings WHERE trigram = ?", (gram,)).fetchone()
+            ids = set(unpack(row[0])) if row else set()
+            ids.difference_update(removed.get(gram, ()))
+            ids.update(added.get(gram, ()))
+            if ids:
+                conn.execute("INSERT OR REPLACE INTO postings (trigram, ids) VALUES (?, ?)", (gram, pack(sorted(ids))))
+            elif row:
+                conn.execute("DELETE FROM postings WHERE trigram = ?", (gram,))
+        removed.clear()
+        added.clear()
+
+    # -------------------------------
+    # Querying
+    # -------------------------------
+    def _contains(self, rel_path: str, needles: list[bytes]) -> bool:
+        if not needles:
+            return True
+        data = read_text_file(os.path.join(self.root, rel_path))
+        if not data:
+            return False
+        data = data.lower()
+        return all(needle in data for needle in needles)
+
+    def left_out(self) -> int:
+        """Number of files not indexed (and not searched) because the index is full."""
+        if not self.ready:
+            return 0
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM files WHERE grams IS NULL").fetchone()[0]
+
+    def candidates(self, literals: list[str]) -> list[str]:
+        """Relative paths of the files containing every trigram of the literals."""
+        if not self.ready:
+            # The first refresh of this session has not committed: scan the files
+            needles = _needles(literals)
+            return sorted(
+                rel_path for rel_path, _ in iter_project_files(self.root, max_bytes=SEARCH_MAX_FILE_BYTES)
+                if self._contains(rel_path, needles)
+            )
+        grams = set()
+        for literal in literals:
+            grams |= trigrams(literal.encode("utf-8"))
+        # Only ASCII is case folded in the index, so other trigrams could miss
+        # case-insensitive matches
+        grams = {gram for gram in grams if not gram & 0x808080}
+        # Any subset still gives a superset of the matches, keep the query small
+        grams = sorted(grams)[:64]
+        with self.lock:
+            if not grams:
+                rows = self.conn.execute("SELECT path FROM files WHERE grams IS NOT NULL ORDER BY path").fetchall()
+                return [row[0] for row in rows]
+            blobs = self.conn.execute(
+                f"SELECT ids FROM postings WHERE trigram IN ({','.join('?' * len(grams))})", grams
+            ).fetchall()
+            if len(blobs) < len(grams):
+                return []
+            # Intersect from the rarest trigram, the smallest blob
+            blobs = sorted((row[0] for row in blobs), key=len)
+            ids = set(unpack(blobs[0]))
+            for blob in blobs[1:]:
+                if not ids:
+                    break
+                ids.intersection_update(unpack(blob))
+            ids = sorted(ids)
+            paths = []
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                paths.extend(row[0] for row in self.conn.execute(
+                    f"SELECT path FROM files WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                ))
+        return sorted(paths)
+
+    def search(self, regex: re.Pattern, literals: list[str], context: int = 2, max_results: int = 50, path_filter=None):
+        """
+        Yield (relative path, [(line number, line, is_match)]) blocks of matches.
+
+        Consecutive matches whose context windows overlap are merged into one
+        block. Stops after `max_results` matching lines.
+        """
+        found = 0
+        for rel_path in self.candidates(literals):
+            if path_filter is not None and not path_filter(rel_path):
+                continue
+            data = read_text_file(os.path.join(self.root, rel_path))
+            if not data:
+                continue
+            text = data.decode("utf-8", "replace")
+            if not regex.search(text):
+                continue
+            lines = text.splitlines()
+            hits = [number for number, line in enumerate(lines) if regex.search(line)]
+            if not hits:
+                continue
+            hits = hits[:max_results - found]
+            found += len(hits)
+
+            # Merge the context windows of nearby matches into one block
+            windows = []
+            for number in hits:
+                start, end = max(number - context, 0), min(number + context, len(lines) - 1)
+                if windows and start <= windows[-1][1] + 1:
+                    windows[-1][1] = end
+                else:
+                    windows.append([start, end])
+            matched = set(hits)
+            for start, end in windows:
+                yield rel_path, [(index + 1, lines[index], index in matched) for index in range(start, end + 1)]
+            if found >= max_results:
+                return
+
+
+_indexes: dict[str, TrigramIndex] = {}
+
+
+def get_trigram_index(root: str = "./") -> TrigramIndex:
+    """Return the process wide TrigramIndex for a root folder."""
+    abs_root = os.path.abspath(root)
+    if abs_root not in _indexes:
+        _indexes[abs_root] = TrigramIndex(abs_root)
+    return _indexes[abs_root]
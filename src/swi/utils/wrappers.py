@@ -0,0 +1,66 @@
+import json
+from typing import Any
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk, ChatResult, ChatGeneration
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+class ChatModelWrapper(BaseChatModel):
+    """
+    Base for chat models that add behaviour around another chat model.
+
+    Tools are bound on the wrapper as OpenAI tool schemas, which every provider
+    in swi.utils.model accepts through its request kwargs, so the wrapped model
+    receives them on each call. `BaseChatModel.astream` reports streamed tokens
+    to the callbacks, so wrappers only yield chunks and never touch run_manager.
+    """
+
+    inner: BaseChatModel
+
+    @property
+    def _llm_type(self) -> str:
+        return f"{type(self).__name__}:{self.inner._llm_type}"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return self.inner._identifying_params
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        if tool_choice is not None:
+            kwargs["tool_choice"] = tool_choice
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    # -------------------------------
+    # Delegation, override to add behaviour
+    # -------------------------------
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return self.inner._generate(messages, stop=stop, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return await self.inner._agenerate(messages, stop=stop, **kwargs)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        async for chunk in self.inner._astream(messages, stop=stop, **kwargs):
+            yield chunk
+
+
+def message_to_chunk(message: AIMessage) -> ChatGenerationChunk:
+    """Replay a complete AI message as a single stream chunk."""
+    # Raw provider tool calls would be merged twice, tool_call_chunks carry them
+    additional_kwargs = {k: v for k, v in message.additional_kwargs.items() if k != "tool_calls"}
+    return ChatGenerationChunk(message=AIMessageChunk(
+        content=message.content,
+        additional_kwargs=additional_kwargs,
+        response_metadata=message.response_metadata,
+        usage_metadata=message.usage_metadata,
+        tool_call_chunks=[
+            {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+            for i, call in enumerate(message.tool_calls)
+        ],
+    ))
+
+
+def result_from_message(message: AIMessage) -> ChatResult:
+    return ChatResult(generations=[ChatGeneration(message=message)])